@@ -11,8 +11,16 @@ from .routes.category_routes import bp as category_bp
 from .routes.address_routes import bp as address_bp
 from .routes.auth_routes import bp as auth_bp  # Import auth routes
 
-from .db import db, migrate
-from .models import user, order, order_item, product, product_category, category, cart, cart_item, address
+from .db import DEFAULT_READ_YOUR_WRITES_WINDOW, TRUE_VALUES, db, migrate, engine_options_from_env, init_read_replicas
+from .cache import DEFAULT_CATALOG_CACHE_MAX_AGE, DEFAULT_CATALOG_CACHE_SIZE, catalog_cache
+from .invalidation import DEFAULT_INVALIDATION_CHANNEL, invalidation_bus
+from .commands import register_commands
+from .serializers import serializers
+from . import compression, instrumentation, json_provider, metrics
+from .compression import DEFAULT_BROTLI_LEVEL, DEFAULT_GZIP_LEVEL, DEFAULT_MIN_SIZE
+from .instrumentation import DEFAULT_N_PLUS_ONE_THRESHOLD
+from .services.idempotency_service import DEFAULT_IDEMPOTENCY_CLAIM_TIMEOUT, DEFAULT_IDEMPOTENCY_KEY_TTL
+from .models import user, order, order_item, product, product_category, category, cart, cart_item, address, idempotency_key
 
 def create_app(config=None):
     app = Flask(__name__)
@@ -26,12 +34,48 @@ def create_app(config=None):
 
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('SQLALCHEMY_DATABASE_URI')
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_from_env(
+        app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['CACHE_INVALIDATION_DATABASE_URI'] = os.environ.get('CACHE_INVALIDATION_DATABASE_URI')
+    app.config['CACHE_INVALIDATION_CHANNEL'] = os.environ.get(
+        'CACHE_INVALIDATION_CHANNEL', DEFAULT_INVALIDATION_CHANNEL)
+    app.config['CATALOG_CACHE_SIZE'] = int(os.environ.get('CATALOG_CACHE_SIZE', DEFAULT_CATALOG_CACHE_SIZE))
+    app.config['CATALOG_CACHE_MAX_AGE'] = int(
+        os.environ.get('CATALOG_CACHE_MAX_AGE', DEFAULT_CATALOG_CACHE_MAX_AGE))
+    app.config['SQLALCHEMY_REPLICA_URIS'] = [
+        uri for uri in os.environ.get('SQLALCHEMY_REPLICA_URIS', '').split(',') if uri]
+    app.config['READ_YOUR_WRITES_WINDOW'] = int(
+        os.environ.get('READ_YOUR_WRITES_WINDOW', DEFAULT_READ_YOUR_WRITES_WINDOW))
+    app.config['N_PLUS_ONE_THRESHOLD'] = int(
+        os.environ.get('N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD))
+    # Server-Timing headers default to debug mode, which is only known once the config is loaded
+    if 'SERVER_TIMING' in os.environ:
+        app.config['SERVER_TIMING'] = os.environ['SERVER_TIMING'].lower() in TRUE_VALUES
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', 'true').lower() in TRUE_VALUES
+    app.config['ORJSON_ENABLED'] = os.environ.get('ORJSON_ENABLED', 'true').lower() in TRUE_VALUES
+    app.config['COMPRESSION_ENABLED'] = os.environ.get('COMPRESSION_ENABLED', 'true').lower() in TRUE_VALUES
+    app.config['COMPRESSION_MIN_SIZE'] = int(os.environ.get('COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE))
+    app.config['COMPRESSION_GZIP_LEVEL'] = int(os.environ.get('COMPRESSION_GZIP_LEVEL', DEFAULT_GZIP_LEVEL))
+    app.config['COMPRESSION_BROTLI_LEVEL'] = int(os.environ.get('COMPRESSION_BROTLI_LEVEL', DEFAULT_BROTLI_LEVEL))
+    app.config['IDEMPOTENCY_KEY_TTL'] = int(os.environ.get('IDEMPOTENCY_KEY_TTL', DEFAULT_IDEMPOTENCY_KEY_TTL))
+    app.config['IDEMPOTENCY_CLAIM_TIMEOUT'] = int(
+        os.environ.get('IDEMPOTENCY_CLAIM_TIMEOUT', DEFAULT_IDEMPOTENCY_CLAIM_TIMEOUT))
 
     if config:
         app.config.update(config)
 
+    metrics.configure_engine(app)
+    init_read_replicas(app)
     db.init_app(app)
     migrate.init_app(app, db)
+    serializers.init_app(app)
+    json_provider.init_app(app)
+    catalog_cache.init_app(app)
+    invalidation_bus.init_app(app)
+    invalidation_bus.subscribe(catalog_cache.evict, catalog_cache.invalidate)
+    instrumentation.init_app(app)
+    metrics.init_app(app)
+    compression.init_app(app)
 
     global oauth
     oauth = register_oauth(app)
@@ -43,5 +87,7 @@ def create_app(config=None):
     app.register_blueprint(category_bp)
     app.register_blueprint(address_bp)
     app.register_blueprint(auth_bp, url_prefix="/auth")
+
+    register_commands(app)
     
     return app
\ No newline at end of file
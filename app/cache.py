@@ -0,0 +1,193 @@
+"""
+This module provides the in-process cache for serialized catalog responses.
+
+The catalog changes a few times a day, but every `GET /products` and
+`GET /products/<id>` request used to hit Postgres. Each worker now keeps the
+serialized JSON bodies of recent catalog responses, keyed by the normalized
+query parameters, in a size-bounded LRU cache.
+
+Every entry is tagged with the entity keys its body was built from (e.g.
+`"products"` for listings, `"product:<id>"` for a single product). Writes
+publish those keys on the invalidation bus (`app.invalidation`), which calls
+`catalog_cache.evict(keys)` in every worker once the write has committed.
+Listings are also tagged with the key of every product they contain, so stock
+changes (add to cart, orders) publish only the product keys and evict only the
+listings that show those products.
+
+Evictions also bump a generation counter. A response is only stored if no
+eviction happened since its data was read, so a response built from data read
+before a write can never be served after it.
+
+Bodies are always built from the primary database, never a read replica: a
+replica lagging behind an eviction would otherwise put stale data back in the
+cache until the next write.
+
+Responses carry a strong ETag (a hash of the body, so every worker computes the
+same one) and a `Cache-Control` header. Requests whose `If-None-Match` matches
+get an empty 304, which lets browsers and the CDN revalidate for free.
+
+Bodies are compressed for clients that accept it (`app.compression`) once per
+encoding, on the first hit that asks for it, and the compressed bytes are kept
+with the entry; each encoding has its own ETag.
+
+Classes:
+    CachedResponse: A serialized response body, its ETag and its compressed versions.
+    CatalogCache: Size-bounded LRU cache of serialized responses.
+
+Functions:
+    cached_json_response(key, build, tags): Serve a JSON response from the cache, building it on a miss.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, NamedTuple, Optional, Union
+
+from flask import current_app, jsonify, request
+
+from app.compression import choose_encoding, compress
+from app.db import use_primary
+
+DEFAULT_CATALOG_CACHE_SIZE = 256
+DEFAULT_CATALOG_CACHE_MAX_AGE = 60
+
+
+class CachedResponse(NamedTuple):
+    """A serialized response body, its strong ETag and its compressed bodies by encoding."""
+    body: bytes
+    etag: str
+    compressed: dict[str, bytes]
+
+    def encoded(self, encoding: Optional[str]) -> tuple[bytes, str]:
+        """Return the body and ETag for `encoding` (None for the uncompressed body), compressing on first use."""
+        if encoding is None:
+            return self.body, self.etag
+        body = self.compressed.get(encoding)
+        if body is None:
+            body = compress(self.body, encoding)
+            self.compressed[encoding] = body
+        return body, f"{self.etag}-{encoding}"
+
+
+class CatalogCache:
+    """
+    Size-bounded LRU cache of serialized catalog responses, evicted by entity key.
+
+    Attributes:
+        max_size (int): Maximum number of cached responses. 0 disables the cache.
+        generation (int): Incremented on every eviction.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CATALOG_CACHE_SIZE):
+        self.max_size = max_size
+        self.generation = 0
+        self._entries: OrderedDict[Hashable, tuple[CachedResponse, frozenset]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """Configure the cache from `CATALOG_CACHE_SIZE`, empty it and register it on the app."""
+        self.max_size = app.config.get("CATALOG_CACHE_SIZE", DEFAULT_CATALOG_CACHE_SIZE)
+        self.invalidate()
+        app.extensions["catalog_cache"] = self
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        """
+        Return the cached response for `key`.
+
+        Args:
+            key (Hashable): The normalized request key.
+
+        Returns:
+            Optional[CachedResponse]: The cached response, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: Hashable, response: CachedResponse, generation: int,
+            tags: Iterable[str] = ()) -> None:
+        """
+        Store a response read during `generation`, evicting the least recently used entries.
+
+        Responses built from data read before the latest invalidation are discarded.
+
+        Args:
+            key (Hashable): The normalized request key.
+            response (CachedResponse): The serialized response.
+            generation (int): The generation observed before the data was read.
+            tags (Iterable[str]): The entity keys the body was built from.
+        """
+        with self._lock:
+            if generation != self.generation or self.max_size <= 0:
+                return
+            self._entries[key] = (response, frozenset(tags))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, keys: Iterable[str]) -> None:
+        """
+        Drop every cached response tagged with one of `keys` and bump the generation.
+
+        Args:
+            keys (Iterable[str]): The entity keys that changed.
+        """
+        keys = set(keys)
+        with self._lock:
+            self.generation += 1
+            for key in [key for key, (_, tags) in self._entries.items() if tags & keys]:
+                del self._entries[key]
+
+    def invalidate(self) -> None:
+        """Bump the generation and drop every cached response."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+catalog_cache = CatalogCache()
+
+
+def cached_json_response(key: Hashable, build: Callable[[], object],
+                         tags: Union[Iterable[str], Callable[[object], Iterable[str]]] = ()):
+    """
+    Serve a JSON response from the catalog cache, building and caching it on a miss.
+
+    The response carries a strong ETag and `Cache-Control: public, max-age=...`
+    (`CATALOG_CACHE_MAX_AGE` seconds), and is turned into an empty 304 when the
+    request's `If-None-Match` matches. The body is compressed for the request's
+    `Accept-Encoding` from the bytes stored with the entry.
+
+    Args:
+        key (Hashable): The normalized request key.
+        build (Callable[[], object]): Returns the JSON-serializable payload on a miss.
+        tags (Iterable[str] | Callable[[object], Iterable[str]]): The entity keys the payload is
+            built from, or a function returning them for the payload.
+
+    Returns:
+        Response: A 200 JSON response, or a 304 without a body.
+    """
+    cached = catalog_cache.get(key)
+    if cached is None:
+        generation = catalog_cache.generation
+        with use_primary():
+            payload = build()
+            body = jsonify(payload).get_data()
+        if callable(tags):
+            tags = tags(payload)
+        cached = CachedResponse(body, hashlib.sha256(body).hexdigest()[:32], {})
+        catalog_cache.set(key, cached, generation, tags)
+
+    encoding = choose_encoding(len(cached.body))
+    body, etag = cached.encoded(encoding)
+    response = current_app.response_class(body, mimetype="application/json")
+    if encoding is not None:
+        response.content_encoding = encoding
+    response.vary.add("Accept-Encoding")
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get(
+        "CATALOG_CACHE_MAX_AGE", DEFAULT_CATALOG_CACHE_MAX_AGE)
+    return response.make_conditional(request)
@@ -0,0 +1,121 @@
+"""
+This module registers the application's `flask` CLI commands.
+
+Commands:
+    flask purge-idempotency-keys: Delete expired idempotency keys. Meant to run
+        on a schedule (e.g. hourly from cron or the platform's scheduler).
+    flask db-advise: Report foreign keys that no index covers.
+    flask seed: Load a synthetic production-scale dataset (see `app.seed`).
+
+Functions:
+    find_unindexed_foreign_keys(metadata: MetaData) -> list[tuple[str, list[str]]]:
+"""
+import time
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import Column, MetaData, UniqueConstraint
+
+from app.db import db
+from app.seed import DEFAULT_ZIPF_EXPONENT, database_is_empty, seed_database, truncate_seeded_tables
+from app.services.idempotency_service import purge_expired_idempotency_keys
+
+
+@click.command("purge-idempotency-keys")
+@with_appcontext
+def purge_idempotency_keys_command():
+    """Delete the idempotency keys older than IDEMPOTENCY_KEY_TTL."""
+    deleted = purge_expired_idempotency_keys()
+    click.echo(f"Deleted {deleted} expired idempotency keys.")
+
+
+def find_unindexed_foreign_keys(metadata: MetaData) -> list[tuple[str, list[str]]]:
+    """
+    Find the foreign keys whose columns are not the leading columns of any index.
+
+    Without such an index, every delete of a referenced row and every join or
+    lookup by the foreign key scans the whole referencing table. Primary keys,
+    unique constraints and indexes all count; the foreign key columns may come
+    in any order, but must be the first columns of the index.
+
+    Args:
+        metadata (MetaData): The metadata to inspect, e.g. `db.metadata`.
+
+    Returns:
+        list[tuple[str, list[str]]]: The table name and column names of every uncovered foreign key.
+    """
+    unindexed = []
+    for table in metadata.sorted_tables:
+        leading_columns = []
+        if table.primary_key.columns:
+            leading_columns.append(list(table.primary_key.columns))
+        leading_columns.extend(
+            list(constraint.columns) for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint)
+        )
+        # Expression elements (e.g. `order_date DESC`) end the usable prefix of an index
+        leading_columns.extend(list(index.expressions) for index in table.indexes)
+
+        foreign_keys = sorted(
+            table.foreign_key_constraints, key=lambda fk: [column.name for column in fk.columns])
+        for foreign_key in foreign_keys:
+            columns = list(foreign_key.columns)
+            covered = any(
+                all(isinstance(element, Column) for element in prefix[:len(columns)])
+                and set(prefix[:len(columns)]) == set(columns)
+                for prefix in leading_columns
+            )
+            if not covered:
+                unindexed.append((table.name, [column.name for column in columns]))
+    return unindexed
+
+
+@click.command("db-advise")
+@with_appcontext
+def db_advise_command():
+    """Report foreign keys with no covering index; exits with 1 if there are any."""
+    unindexed = find_unindexed_foreign_keys(db.metadata)
+    for table, columns in unindexed:
+        click.echo(f"{table}({', '.join(columns)}): foreign key has no covering index")
+    if unindexed:
+        raise SystemExit(1)
+    click.echo("Every foreign key is covered by an index.")
+
+
+@click.command("seed")
+@click.option("--products", type=click.IntRange(min=1), default=100_000, show_default=True,
+              help="Number of products.")
+@click.option("--categories", type=click.IntRange(min=1), default=100, show_default=True,
+              help="Number of categories.")
+@click.option("--users", type=click.IntRange(min=1), default=100_000, show_default=True,
+              help="Number of users.")
+@click.option("--orders", type=click.IntRange(min=0), default=1_000_000, show_default=True,
+              help="Number of orders.")
+@click.option("--cart-ratio", type=click.FloatRange(0, 1), default=0.2, show_default=True,
+              help="Share of users with a non-empty cart.")
+@click.option("--zipf-exponent", default=DEFAULT_ZIPF_EXPONENT, show_default=True,
+              help="Popularity skew of products, categories and buyers.")
+@click.option("--seed", "random_seed", default=0, show_default=True, help="Random seed.")
+@click.option("--truncate", is_flag=True, help="Empty the tables first, deleting all their data.")
+@with_appcontext
+def seed_command(products, categories, users, orders, cart_ratio, zipf_exponent, random_seed, truncate):
+    """Load a synthetic production-scale dataset into an empty database."""
+    if truncate:
+        truncate_seeded_tables()
+    elif not database_is_empty():
+        raise click.ClickException("The database is not empty; use --truncate to replace its data.")
+
+    started = time.perf_counter()
+    counts = seed_database(
+        products=products, categories=categories, users=users, orders=orders,
+        cart_ratio=cart_ratio, zipf_exponent=zipf_exponent, seed=random_seed)
+    for table, rows in counts.items():
+        click.echo(f"{table}: {rows} rows")
+    click.echo(f"Loaded {sum(counts.values())} rows in {time.perf_counter() - started:.1f}s.")
+
+
+def register_commands(app) -> None:
+    """Register the CLI commands on the app."""
+    app.cli.add_command(purge_idempotency_keys_command)
+    app.cli.add_command(db_advise_command)
+    app.cli.add_command(seed_command)
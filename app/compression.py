@@ -0,0 +1,129 @@
+"""
+This module compresses response bodies for clients that accept it.
+
+Product listings carry long descriptions and image URLs, and order histories
+grow with every order, so their JSON compresses well. Responses are compressed
+with brotli (when the `brotli` package is installed) or gzip, whichever the
+request's `Accept-Encoding` prefers, as long as:
+
+- the body is at least `COMPRESSION_MIN_SIZE` bytes (500 by default), below
+  which the headers and CPU cost outweigh the savings;
+- its mimetype is textual (JSON, text, JavaScript, XML);
+- it is not streamed and has no `Content-Encoding` yet.
+
+`COMPRESSION_GZIP_LEVEL` (6) and `COMPRESSION_BROTLI_LEVEL` (4) trade CPU for
+size. Compressed responses get `Vary: Accept-Encoding`, and their ETag is
+suffixed with the encoding, since a strong ETag identifies exact bytes.
+
+The catalog cache (`app.cache`) compresses each cached body once per encoding
+and serves the stored bytes on every hit; those responses are left alone here.
+
+Functions:
+    choose_encoding(size) -> Optional[str]: Pick the encoding of a body for the current request.
+    compress(data, encoding) -> bytes: Compress a body with an encoding.
+    init_app(app): Compress the app's responses.
+"""
+import gzip
+from typing import Optional
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_MIN_SIZE = 500
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_LEVEL = 4
+COMPRESSIBLE_MIMETYPES = frozenset({
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+})
+
+
+def _supported_encodings() -> tuple[str, ...]:
+    """The encodings this worker can produce, preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(size: int) -> Optional[str]:
+    """
+    Pick the encoding of a response body for the current request.
+
+    Args:
+        size (int): The length of the uncompressed body, in bytes.
+
+    Returns:
+        Optional[str]: "br" or "gzip", or None if the body should be sent as is.
+    """
+    config = current_app.config
+    if not config.get("COMPRESSION_ENABLED", True) or size < config.get("COMPRESSION_MIN_SIZE", DEFAULT_MIN_SIZE):
+        return None
+    accepted = request.accept_encodings
+    best, best_quality = None, 0
+    for encoding in _supported_encodings():
+        quality = accepted[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    Compress a body at the level configured for `encoding`.
+
+    gzip output carries no timestamp, so the same body always compresses to the
+    same bytes and keeps its ETag across workers.
+
+    Args:
+        data (bytes): The uncompressed body.
+        encoding (str): "br" or "gzip".
+
+    Returns:
+        bytes: The compressed body.
+    """
+    config = current_app.config
+    if encoding == "br":
+        return brotli.compress(data, quality=config.get("COMPRESSION_BROTLI_LEVEL", DEFAULT_BROTLI_LEVEL))
+    return gzip.compress(data, compresslevel=config.get("COMPRESSION_GZIP_LEVEL", DEFAULT_GZIP_LEVEL), mtime=0)
+
+
+def _is_compressible(response) -> bool:
+    return (
+        200 <= response.status_code < 300
+        and response.status_code != 204
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and "Content-Encoding" not in response.headers
+        and (response.mimetype.startswith("text/") or response.mimetype in COMPRESSIBLE_MIMETYPES)
+    )
+
+
+def init_app(app) -> None:
+    """
+    Compress the responses of the app for clients that accept it.
+
+    Disabled when `COMPRESSION_ENABLED` is false.
+    """
+    if not app.config.get("COMPRESSION_ENABLED", True):
+        return
+
+    @app.after_request
+    def compress_response(response):
+        if not _is_compressible(response):
+            return response
+        response.vary.add("Accept-Encoding")
+        data = response.get_data()
+        encoding = choose_encoding(len(data))
+        if encoding is None:
+            return response
+
+        response.set_data(compress(data, encoding))
+        response.content_encoding = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak)
+        return response
@@ -1,6 +1,170 @@
+"""
+This module provides the database extension objects and their configuration.
+
+Read replicas:
+    When `SQLALCHEMY_REPLICA_URIS` lists one or more replica URIs, `GET` and
+    `HEAD` requests read from a replica picked at random for the request, and
+    every other request uses the primary. Within a read request, the session
+    falls back to the primary for the rest of the request as soon as it
+    writes or locks rows (`SELECT ... FOR UPDATE`).
+
+    Replicas lag behind the primary. After a request that wrote, the response
+    sets a short-lived `db_read_primary` cookie (`READ_YOUR_WRITES_WINDOW`
+    seconds, 5 by default), and read requests carrying it go to the primary,
+    so a client always sees its own writes. Cached catalog responses are
+    always built from the primary (see `app.cache`).
+
+Classes:
+    RoutingSession: Session that sends the reads of read-only requests to a replica.
+
+Functions:
+    engine_options_from_env(database_uri, environ): Engine options from environment variables.
+    init_read_replicas(app): Register the replica binds and route read-only requests to them.
+    use_primary(): Read from the primary within a block.
+"""
+import os
+import random
+from contextlib import contextmanager
+from typing import Iterator
+
+from flask import request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_migrate import Migrate
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, make_url
 from .models.base import Base
 
-db = SQLAlchemy(model_class=Base)
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+REPLICA_BIND_PREFIX = "replica_"
+READ_PRIMARY_COOKIE = "db_read_primary"
+DEFAULT_READ_YOUR_WRITES_WINDOW = 5
+READ_ONLY_METHODS = {"GET", "HEAD"}
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the reads of read-only requests to a replica.
+
+    `session.info["replica"]` holds the bind key of the replica chosen for the
+    request; reads go to the primary when it is not set. `session.info["wrote"]`
+    is set once the session flushes, executes an INSERT/UPDATE/DELETE or locks
+    rows; every statement then goes to the primary.
+
+    A session bound to a connection (as in the test fixtures, which join an
+    outer transaction) runs every statement on that connection.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and isinstance(self.bind, Connection):
+            return self.bind
+        if bind is None and not self.info.get("wrote"):
+            if clause is not None and (clause.is_dml or getattr(clause, "_for_update_arg", None) is not None):
+                self.info["wrote"] = True
+            elif self.info.get("replica") is not None:
+                return self._db.engines[self.info["replica"]]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _mark_written(session, flush_context, instances):
+    session.info["wrote"] = True
+
+
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
 migrate = Migrate()
+
+
+def engine_options_from_env(database_uri: str = None, environ=os.environ) -> dict:
+    """
+    Build `SQLALCHEMY_ENGINE_OPTIONS` from environment variables.
+
+    Variables (defaults in parentheses):
+        DB_POOL_SIZE (5): Connections kept open per worker.
+        DB_MAX_OVERFLOW (10): Extra connections a worker may open under load.
+            Each worker can hold up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections,
+            which must fit in Postgres' max_connections (or PgBouncer's pool).
+        DB_POOL_TIMEOUT (30): Seconds to wait for a free connection before failing.
+        DB_POOL_PRE_PING (true): Test connections on checkout and replace dead ones.
+        DB_POOL_RECYCLE (1800): Seconds after which connections are replaced.
+        DB_PGBOUNCER_TRANSACTION_MODE (false): The database URI points to PgBouncer
+            in transaction pooling mode. Consecutive transactions may then run on
+            different server connections, so no prepared statements may be kept
+            on the server. psycopg2 never prepares statements; psycopg (3) and
+            asyncpg are configured not to.
+
+    Args:
+        database_uri (str, optional): The database URI, used to pick driver-specific options.
+        environ (Mapping, optional): The environment to read. Defaults to `os.environ`.
+
+    Returns:
+        dict: The engine options.
+    """
+    options = {
+        "pool_size": int(environ.get("DB_POOL_SIZE", 5)),
+        "max_overflow": int(environ.get("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(environ.get("DB_POOL_TIMEOUT", 30)),
+        "pool_pre_ping": environ.get("DB_POOL_PRE_PING", "true").lower() in TRUE_VALUES,
+        "pool_recycle": int(environ.get("DB_POOL_RECYCLE", 1800)),
+    }
+
+    if environ.get("DB_PGBOUNCER_TRANSACTION_MODE", "false").lower() in TRUE_VALUES and database_uri:
+        driver = make_url(database_uri).get_driver_name()
+        if driver == "psycopg":
+            options["connect_args"] = {"prepare_threshold": None}
+        elif driver == "asyncpg":
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+
+    return options
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """Send the reads of the current session to the primary within the block."""
+    replica = db.session.info.pop("replica", None)
+    try:
+        yield
+    finally:
+        if replica is not None:
+            db.session.info["replica"] = replica
+
+
+def init_read_replicas(app) -> None:
+    """
+    Register `SQLALCHEMY_REPLICA_URIS` as binds and route read-only requests to them.
+
+    Must run before `db.init_app`. Each replica engine gets the same
+    `SQLALCHEMY_ENGINE_OPTIONS` as the primary. Does nothing without replicas.
+    """
+    replica_uris = app.config.get("SQLALCHEMY_REPLICA_URIS") or []
+    if not replica_uris:
+        return
+
+    binds = app.config.setdefault("SQLALCHEMY_BINDS", {})
+    engine_options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+    replica_keys = []
+    for index, uri in enumerate(replica_uris):
+        key = f"{REPLICA_BIND_PREFIX}{index}"
+        binds[key] = {**engine_options, "url": uri}
+        replica_keys.append(key)
+    window = app.config.get("READ_YOUR_WRITES_WINDOW", DEFAULT_READ_YOUR_WRITES_WINDOW)
+
+    @app.before_request
+    def route_reads():
+        db.session.info.pop("wrote", None)
+        if request.method in READ_ONLY_METHODS and READ_PRIMARY_COOKIE not in request.cookies:
+            db.session.info["replica"] = random.choice(replica_keys)
+
+    @app.after_request
+    def start_read_your_writes_window(response):
+        if db.session.info.get("wrote"):
+            response.set_cookie(
+                READ_PRIMARY_COOKIE, "1", max_age=window, httponly=True,
+                secure=app.config["SESSION_COOKIE_SECURE"],
+                samesite=app.config["SESSION_COOKIE_SAMESITE"])
+        return response
+
+    @app.teardown_request
+    def stop_routing_reads(exception=None):
+        db.session.info.pop("replica", None)
@@ -65,6 +65,40 @@ class StatusError(ApplicationError):
         else:
             super().__init__(f"Invalid status: {current_status}.")
 
+class IdempotencyKeyInProgressError(ApplicationError):
+    """
+    Raised when a request reuses an idempotency key whose first request has not finished yet.
+
+    Attributes:
+        key (str): The idempotency key.
+    """
+    def __init__(self, key: str):
+        super().__init__(
+            f"A request with idempotency key '{key}' is still being processed. Retry later."
+        )
+
+class IdempotencyKeyMismatchError(ApplicationError):
+    """
+    Raised when an idempotency key is reused with a different request body.
+
+    Attributes:
+        key (str): The idempotency key.
+    """
+    def __init__(self, key: str):
+        super().__init__(
+            f"Idempotency key '{key}' was already used for a different request."
+        )
+
+class InvalidFieldsError(ApplicationError):
+    """
+    Raised when a `fields` query parameter names fields the resource does not have.
+
+    Attributes:
+        fields (list[str]): The unknown fields.
+    """
+    def __init__(self, fields: list[str]):
+        super().__init__(f"Unknown fields: {', '.join(fields)}.")
+
 class InstanceNotFoundError(Exception):
     """Custom exception raised when a model instance is not found."""
     def __init__(self, model, model_id: UUID):
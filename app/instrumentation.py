@@ -0,0 +1,155 @@
+"""
+This module provides per-request SQL instrumentation.
+
+SQLAlchemy engine events count every statement and its execution time into the
+query trackers active in the current context. Each request gets a tracker:
+
+- In debug mode (or with `SERVER_TIMING` enabled) the totals are sent back in a
+  `Server-Timing` header, which browsers show in the network panel.
+- When the same statement runs `N_PLUS_ONE_THRESHOLD` times or more in a
+  request (5 by default), a warning names the endpoint and the statement. This
+  is the signature of an N+1 query pattern, e.g. `validate_model` in a loop.
+
+Tests use `track_queries()` directly, or the `assert_max_queries(n)` fixture
+built on it, to pin the query budget of each service function.
+
+Classes:
+    QueryTracker: Counts the statements executed while it is active.
+
+Functions:
+    track_queries() -> Iterator[QueryTracker]: Track the statements executed in a block.
+    init_app(app): Track every request of the app.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+SAVEPOINT_STATEMENTS = ("SAVEPOINT ", "RELEASE SAVEPOINT ", "ROLLBACK TO SAVEPOINT ")
+
+_active_trackers: ContextVar[tuple["QueryTracker", ...]] = ContextVar("active_query_trackers", default=())
+
+
+class QueryTracker:
+    """
+    Counts the SQL statements executed while it is active.
+
+    Attributes:
+        count (int): The number of statements executed.
+        duration (float): The total execution time of the statements, in seconds.
+        statements (Counter[str]): How many times each statement was executed.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        """Record one executed statement."""
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    def repeated_statements(self, threshold: int) -> list[tuple[str, int]]:
+        """Return the statements executed at least `threshold` times, most repeated first."""
+        return [(statement, count) for statement, count in self.statements.most_common()
+                if count >= threshold]
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryTracker]:
+    """
+    Track the SQL statements executed in the current context during the block.
+
+    Trackers nest: the statements of an inner block also count for the outer ones.
+
+    Yields:
+        QueryTracker: The tracker; its counts are final once the block exits.
+    """
+    tracker = QueryTracker()
+    _activate(tracker)
+    try:
+        yield tracker
+    finally:
+        _deactivate(tracker)
+
+
+def _activate(tracker: QueryTracker) -> None:
+    _active_trackers.set(_active_trackers.get() + (tracker,))
+
+
+def _deactivate(tracker: QueryTracker) -> None:
+    _active_trackers.set(tuple(active for active in _active_trackers.get() if active is not tracker))
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start_times"].pop()
+    # Transaction control is not counted: BEGIN and COMMIT never reach the cursor,
+    # and savepoints would otherwise only count under the test fixtures
+    if statement.startswith(SAVEPOINT_STATEMENTS):
+        return
+    for tracker in _active_trackers.get():
+        tracker.record(statement, duration)
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_timer(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start_times"):
+        connection.info["query_start_times"].pop()
+
+
+def init_app(app) -> None:
+    """
+    Track the SQL statements of every request of the app.
+
+    Reads `SERVER_TIMING` (defaults to `app.debug`) and `N_PLUS_ONE_THRESHOLD`.
+    """
+    threshold = app.config.get("N_PLUS_ONE_THRESHOLD", DEFAULT_N_PLUS_ONE_THRESHOLD)
+
+    @app.before_request
+    def start_tracking():
+        g.request_started = time.perf_counter()
+        g.query_tracker = QueryTracker()
+        _activate(g.query_tracker)
+
+    @app.after_request
+    def report_queries(response):
+        tracker = g.get("query_tracker")
+        if tracker is None:
+            return response
+
+        for statement, count in tracker.repeated_statements(threshold):
+            logger.warning(
+                "Possible N+1 query in %s: statement executed %d times: %s",
+                request.endpoint, count, statement)
+
+        if app.config.get("SERVER_TIMING", app.debug):
+            total = time.perf_counter() - g.request_started
+            response.headers.add(
+                "Server-Timing",
+                f'db;dur={tracker.duration * 1000:.2f};desc="{tracker.count} queries"')
+            response.headers.add("Server-Timing", f"app;dur={total * 1000:.2f}")
+        return response
+
+    @app.teardown_request
+    def stop_tracking(exception=None):
+        tracker = g.pop("query_tracker", None)
+        if tracker is not None:
+            _deactivate(tracker)
@@ -0,0 +1,254 @@
+"""
+This module provides the cross-worker cache invalidation bus.
+
+Every gunicorn worker keeps its own in-process caches, so a write handled by
+one worker must evict the matching entries in all the others, on every host.
+The bus uses Postgres `LISTEN/NOTIFY`:
+
+- Write services call `invalidation_bus.publish(keys)` before committing. The
+  entity keys are sent with `pg_notify` inside the write's own transaction, so
+  Postgres delivers them only if the transaction commits, and never before the
+  new data is visible.
+- The publishing worker evicts its own caches right after the commit, so its
+  next read already sees the write.
+- Every worker runs a listener thread holding a dedicated connection that
+  `LISTEN`s on the channel and evicts the keys it receives. When the connection
+  drops, notifications may have been missed, so the listener flushes every
+  subscriber before listening again.
+
+Entity keys are plain strings: `"products"`/`"categories"` for the listings and
+`"product:<id>"`/`"category:<id>"` for single entities.
+
+Classes:
+    InvalidationBus: Publishes entity keys and dispatches them to the subscribed caches.
+    InvalidationListener: Background thread that receives the keys published by other workers.
+
+Functions:
+    product_key(product_id): The entity key of a single product.
+    category_key(category_id): The entity key of a single category.
+"""
+import logging
+import select
+import threading
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import create_engine, event, func, select as sql_select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app.db import db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INVALIDATION_CHANNEL = "cache_invalidation"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_SIZE = 7900
+LISTEN_POLL_INTERVAL = 1
+RECONNECT_DELAY = 1
+MAX_RECONNECT_DELAY = 30
+
+PRODUCTS = "products"
+CATEGORIES = "categories"
+
+# Session.info key under which the keys published in the current transaction are kept
+_PENDING_KEYS = "invalidation_keys"
+
+
+def product_key(product_id) -> str:
+    """Return the entity key of a single product."""
+    return f"product:{product_id}"
+
+
+def category_key(category_id) -> str:
+    """Return the entity key of a single category."""
+    return f"category:{category_id}"
+
+
+class InvalidationListener(threading.Thread):
+    """
+    Daemon thread that `LISTEN`s on the invalidation channel and dispatches the received keys.
+
+    Attributes:
+        database_uri (str): The database to listen on.
+        channel (str): The notification channel.
+        dispatch (Callable[[set[str]], None]): Called with the keys of every notification.
+        flush (Callable[[], None]): Called whenever notifications may have been missed.
+        backend_pid (Optional[int]): The Postgres backend of the current connection.
+    """
+
+    def __init__(self, database_uri: str, channel: str,
+                 dispatch: Callable[[set[str]], None], flush: Callable[[], None]):
+        super().__init__(name="cache-invalidation-listener", daemon=True)
+        self.database_uri = database_uri
+        self.channel = channel
+        self.dispatch = dispatch
+        self.flush = flush
+        self.backend_pid: Optional[int] = None
+        self.listening = threading.Event()
+        self._stopped = threading.Event()
+        self._engine = create_engine(database_uri, poolclass=NullPool)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop listening and wait for the thread to exit."""
+        self._stopped.set()
+        self.join(timeout)
+
+    def run(self) -> None:
+        delay = RECONNECT_DELAY
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("Cache invalidation listener lost its connection.")
+            self.listening.clear()
+            # Anything published while disconnected is lost
+            self.flush()
+            if self._stopped.wait(delay):
+                break
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    def _listen(self) -> None:
+        connection = self._engine.raw_connection()
+        try:
+            dbapi_connection = connection.driver_connection
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            self.backend_pid = dbapi_connection.get_backend_pid()
+            self.listening.set()
+
+            while not self._stopped.is_set():
+                readable, _, _ = select.select([dbapi_connection], [], [], LISTEN_POLL_INTERVAL)
+                if not readable:
+                    continue
+                dbapi_connection.poll()
+                keys = set()
+                while dbapi_connection.notifies:
+                    notification = dbapi_connection.notifies.pop(0)
+                    keys.update(filter(None, notification.payload.split(",")))
+                if keys:
+                    self.dispatch(keys)
+        finally:
+            connection.close()
+
+
+class InvalidationBus:
+    """
+    Publishes changed entity keys and dispatches them to the subscribed caches in every worker.
+
+    Attributes:
+        channel (str): The `NOTIFY` channel, shared by every worker.
+        listener (Optional[InvalidationListener]): This worker's listener thread, once started.
+    """
+
+    def __init__(self, channel: str = DEFAULT_INVALIDATION_CHANNEL):
+        self.channel = channel
+        self.listener: Optional[InvalidationListener] = None
+        self._subscribers: dict[Callable[[set[str]], None], Callable[[], None]] = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """
+        Configure the bus and start this worker's listener before its first request.
+
+        Reads `CACHE_INVALIDATION_CHANNEL` and `CACHE_INVALIDATION_LISTENER`; the
+        listener is disabled by default when testing. It is started lazily so it
+        runs in each forked worker and not in CLI commands.
+
+        `LISTEN` needs a session of its own, which PgBouncer does not provide in
+        transaction pooling mode. The listener then connects to
+        `CACHE_INVALIDATION_DATABASE_URI` (Postgres itself) instead of
+        `SQLALCHEMY_DATABASE_URI`.
+        """
+        self.channel = app.config.get("CACHE_INVALIDATION_CHANNEL", DEFAULT_INVALIDATION_CHANNEL)
+        app.config.setdefault("CACHE_INVALIDATION_LISTENER", not app.testing)
+        app.extensions["invalidation_bus"] = self
+
+        database_uri = (app.config.get("CACHE_INVALIDATION_DATABASE_URI")
+                        or app.config.get("SQLALCHEMY_DATABASE_URI"))
+        if app.config["CACHE_INVALIDATION_LISTENER"] and database_uri:
+            app.before_request(lambda: self.start_listener(database_uri))
+
+    def subscribe(self, evict: Callable[[set[str]], None], flush: Callable[[], None]) -> None:
+        """
+        Register a cache with the bus.
+
+        Args:
+            evict (Callable[[set[str]], None]): Drops the entries tagged with the given keys.
+            flush (Callable[[], None]): Drops every entry.
+        """
+        self._subscribers[evict] = flush
+
+    def publish(self, keys: Iterable[str]) -> None:
+        """
+        Announce that the entities behind `keys` change in the current transaction.
+
+        Must be called before `db.session.commit()`. Nothing is delivered if the
+        transaction rolls back.
+
+        Args:
+            keys (Iterable[str]): The entity keys that change.
+        """
+        keys = set(keys)
+        if not keys:
+            return
+        pending = db.session.info.setdefault(_PENDING_KEYS, {})
+        pending.setdefault(self, set()).update(keys)
+
+        for payload in self._payloads(keys):
+            db.session.execute(sql_select(func.pg_notify(self.channel, payload)))
+
+    def dispatch(self, keys: set[str]) -> None:
+        """Evict `keys` from every subscribed cache."""
+        for evict in list(self._subscribers):
+            evict(keys)
+
+    def flush(self) -> None:
+        """Drop every entry of every subscribed cache."""
+        for flush in list(self._subscribers.values()):
+            flush()
+
+    def start_listener(self, database_uri: str) -> None:
+        """Start this worker's listener thread unless it is already running."""
+        if self.listener is not None and self.listener.is_alive():
+            return
+        with self._lock:
+            if self.listener is None or not self.listener.is_alive():
+                self.listener = InvalidationListener(
+                    database_uri, self.channel, self.dispatch, self.flush)
+                self.listener.start()
+
+    def stop_listener(self, timeout: Optional[float] = None) -> None:
+        """Stop this worker's listener thread, if any."""
+        if self.listener is not None:
+            self.listener.stop(timeout)
+            self.listener = None
+
+    @staticmethod
+    def _payloads(keys: set[str]) -> list[str]:
+        """Split the keys into comma-separated payloads that fit in a notification."""
+        payloads, current = [], ""
+        for key in sorted(keys):
+            candidate = f"{current},{key}" if current else key
+            if len(candidate.encode()) > MAX_PAYLOAD_SIZE and current:
+                payloads.append(current)
+                candidate = key
+            current = candidate
+        payloads.append(current)
+        return payloads
+
+
+invalidation_bus = InvalidationBus()
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_keys(session) -> None:
+    """Evict the keys published in the committed transaction from this worker's caches."""
+    for bus, keys in session.info.pop(_PENDING_KEYS, {}).items():
+        bus.dispatch(keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_keys(session) -> None:
+    """Forget the keys published in a rolled back transaction."""
+    session.info.pop(_PENDING_KEYS, None)
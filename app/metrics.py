@@ -0,0 +1,173 @@
+"""
+This module exposes Prometheus metrics at `/metrics`.
+
+For every endpoint (e.g. `product_bp.retrieve_all_products`) it records:
+
+- `http_request_duration_seconds`: request latency histogram.
+- `http_requests_in_progress`: requests currently being handled.
+- `http_requests_total`: responses by status code.
+- `http_request_db_queries` and `http_request_db_duration_seconds`: SQL
+  statements and DB time per request, from `app.instrumentation`.
+
+It also reports the SQLAlchemy connection pool of each worker: the
+`db_pool_*` gauges, and how long requests wait to check out a connection
+(`db_pool_checkout_wait_seconds`) and how often they give up after
+`DB_POOL_TIMEOUT` (`db_pool_checkout_timeouts_total`). A growing wait means the
+pool (or the database behind it) is too small for the load.
+
+gunicorn runs several worker processes, and a scrape reaches only one of them.
+When `PROMETHEUS_MULTIPROC_DIR` is set, every worker writes its samples to
+files in that directory and `/metrics` aggregates the files of all workers.
+The directory must be emptied before gunicorn starts, and
+`gunicorn.conf.py` cleans up after workers that exit.
+
+Classes:
+    InstrumentedQueuePool: QueuePool that records checkout wait times.
+
+Functions:
+    configure_engine(app): Use `InstrumentedQueuePool` for the app's engine.
+    init_app(app): Instrument the app and register the `/metrics` endpoint.
+"""
+import os
+import time
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app.db import db
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency.", ["method", "endpoint"])
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests currently being handled.", ["method", "endpoint"],
+    multiprocess_mode="livesum")
+REQUESTS = Counter(
+    "http_requests", "Responses sent.", ["method", "endpoint", "status"])
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request.", ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55))
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL statements per request.", ["endpoint"])
+
+POOL_SIZE = Gauge(
+    "db_pool_size", "Configured size of the connection pool.", multiprocess_mode="livesum")
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool.",
+    multiprocess_mode="livesum")
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections currently open beyond the pool size.",
+    multiprocess_mode="livesum")
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool, including opening new connections.",
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30))
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts", "Checkouts that failed because the pool stayed exhausted.")
+
+# Requests that match no route share one label, to bound the label cardinality
+UNMATCHED_ENDPOINT = "unmatched"
+
+
+def _endpoint() -> str:
+    return request.endpoint or UNMATCHED_ENDPOINT
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection."""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+def configure_engine(app) -> None:
+    """
+    Make the app's engine use `InstrumentedQueuePool`.
+
+    Must run before `db.init_app`. Leaves an explicitly configured `poolclass`
+    alone, and does nothing when `METRICS_ENABLED` is false.
+    """
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    options = app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+    options.setdefault("poolclass", InstrumentedQueuePool)
+
+
+def _report_pool() -> None:
+    """Update the pool gauges from this worker's engine."""
+    pool = db.engine.pool
+    # NullPool and StaticPool do not keep counts
+    if not hasattr(pool, "checkedout"):
+        return
+    POOL_SIZE.set(pool.size())
+    POOL_CHECKED_OUT.set(pool.checkedout())
+    POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+
+def metrics():
+    """Serve the metrics of every worker in the Prometheus text format."""
+    _report_pool()
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_app(app) -> None:
+    """
+    Record request metrics for every endpoint and serve them at `/metrics`.
+
+    Disabled when `METRICS_ENABLED` is false.
+    """
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+
+    app.add_url_rule("/metrics", "metrics", metrics)
+
+    @app.before_request
+    def start_request_metrics():
+        if request.endpoint == "metrics":
+            return
+        g.metrics_started = time.perf_counter()
+        REQUESTS_IN_PROGRESS.labels(request.method, _endpoint()).inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get("metrics_started")
+        if started is None:
+            return response
+
+        endpoint = _endpoint()
+        REQUEST_LATENCY.labels(request.method, endpoint).observe(time.perf_counter() - started)
+        REQUESTS.labels(request.method, endpoint, str(response.status_code)).inc()
+
+        tracker = g.get("query_tracker")
+        if tracker is not None:
+            REQUEST_DB_QUERIES.labels(endpoint).observe(tracker.count)
+            REQUEST_DB_DURATION.labels(endpoint).observe(tracker.duration)
+        _report_pool()
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exception=None):
+        if g.pop("metrics_started", None) is not None:
+            REQUESTS_IN_PROGRESS.labels(request.method, _endpoint()).dec()
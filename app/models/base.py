@@ -1,6 +1,8 @@
 from sqlalchemy.orm import DeclarativeBase, declared_attr
 from sqlalchemy import inspect
 
+from app.serializers import serializers
+
 
 class Base(DeclarativeBase):
     """
@@ -29,10 +31,10 @@ class Base(DeclarativeBase):
 
     def to_dict(self):
         """
-        Convert the model instance to a dictionary.
-        This dynamically retrieves all columns and their values.
+        Convert the model instance to a dictionary of all its columns.
+        Uses the model's compiled serializer; values are returned unconverted.
         """
-        return {c.key: getattr(self, c.key) for c in inspect(self).mapper.column_attrs}
+        return serializers.get(type(self), convert=False)(self)
 
     @classmethod
     def from_dict(cls, data):
@@ -30,7 +30,7 @@ class CartItem(db.Model):
     cart_id: Mapped[UUID] = mapped_column(ForeignKey(
         "carts.id", ondelete="CASCADE"), primary_key=True)
     product_id: Mapped[UUID] = mapped_column(ForeignKey(
-        "products.id", ondelete="CASCADE"), primary_key=True)
+        "products.id", ondelete="CASCADE"), primary_key=True, index=True)
 
     # Other fields
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -0,0 +1,36 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey, Integer, String, DateTime, JSON, UniqueConstraint
+
+from app.db import db
+
+
+class IdempotencyKey(db.Model):
+    """
+    Represents an `Idempotency-Key` sent with a non-idempotent request, and the first response to it.
+    Attributes:
+        id (int): The unique identifier for the record.
+        user_id (str): The ID of the user who sent the request.
+        key (str): The client-generated idempotency key, unique per user.
+        request_hash (str): SHA-256 of the request body, used to reject a key reused for another request.
+        response_code (int): The status code of the first response. Null while the request is in progress.
+        response_body (dict): The JSON body of the first response. Null while the request is in progress.
+        created_at (datetime): When the key was first used. Keys expire after `IDEMPOTENCY_KEY_TTL`.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),
+    )
+
+    # Fields
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey(
+        "users.id", ondelete="CASCADE"), nullable=False)
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    response_code: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    response_body: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, index=True, default=lambda: datetime.now(timezone.utc))
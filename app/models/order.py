@@ -4,7 +4,7 @@ from enum import Enum as PyEnum
 from uuid import UUID, uuid4
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship,  validates
-from sqlalchemy import ForeignKey, Numeric, DateTime, Enum, String
+from sqlalchemy import ForeignKey, Numeric, DateTime, Enum, String, Index, text
 
 from app.db import db
 
@@ -50,13 +50,18 @@ class Order(db.Model):
     """
 
     __tablename__ = "orders"
+    __table_args__ = (
+        # Order history pages; id DESC keeps the whole keyset in one direction,
+        # so both "desc" and "asc" pages are a single index range scan
+        Index("ix_orders_user_id_order_date_id", "user_id", text("order_date DESC"), text("id DESC")),
+    )
 
     # Fields
     id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
     user_id: Mapped[String] = mapped_column(
         ForeignKey("users.id"), nullable=False)
     address_id: Mapped[int] = mapped_column(
-        ForeignKey("addresses.id"), nullable=False)
+        ForeignKey("addresses.id"), nullable=False, index=True)
     total_amount: Mapped[Numeric] = mapped_column(
         Numeric(10, 2), nullable=False, default=0.00)
     order_date: Mapped[datetime] = mapped_column(
@@ -30,7 +30,7 @@ class OrderItem(db.Model):
     order_id: Mapped[int] = mapped_column(
         ForeignKey("orders.id"), primary_key=True)
     product_id: Mapped[int] = mapped_column(ForeignKey(
-        "products.id", ondelete="RESTRICT"), primary_key=True)
+        "products.id", ondelete="RESTRICT"), primary_key=True, index=True)
 
     # Other Fields
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -2,7 +2,7 @@ from uuid import UUID, uuid4
 from typing import TYPE_CHECKING
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Float, Integer, Boolean
+from sqlalchemy import String, Float, Integer, Boolean, Index, func, literal_column, text
 
 from app.db import db
 
@@ -11,6 +11,9 @@ if TYPE_CHECKING:
     from .cart_item import CartItem
     from .product_category import ProductCategory
 
+# Text search configuration used for the catalog's full-text search.
+PRODUCT_SEARCH_CONFIG = "english"
+
 
 class Product(db.Model):
     """
@@ -29,6 +32,18 @@ class Product(db.Model):
         categories (list[ProductCategory]): The categories associated with the product.
     """
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset pagination indexes for the "a-z"/"z-a" and "high"/"low" orders
+        Index("ix_products_name_id", "name", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        # Full-text search index; must match the expression built by `search_document()`
+        Index(
+            "ix_products_search_document",
+            text(f"to_tsvector('{PRODUCT_SEARCH_CONFIG}', "
+                 "coalesce(name, '') || ' ' || coalesce(description, ''))"),
+            postgresql_using="gin",
+        ),
+    )
 
     # Fields
     id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
@@ -50,3 +65,18 @@ class Product(db.Model):
     categories: Mapped[list["ProductCategory"]] = relationship(
         "ProductCategory", back_populates="product", lazy="select", cascade="all, delete"
     )
+
+    @classmethod
+    def search_document(cls):
+        """
+        Build the `tsvector` expression the full-text search index is defined on.
+
+        Returns:
+            The SQL expression `to_tsvector(config, name || ' ' || description)`.
+        """
+        return func.to_tsvector(
+            literal_column(f"'{PRODUCT_SEARCH_CONFIG}'"),
+            func.coalesce(cls.name, literal_column("''"))
+            + literal_column("' '")
+            + func.coalesce(cls.description, literal_column("''"))
+        )
@@ -2,7 +2,7 @@ from uuid import UUID
 from typing import TYPE_CHECKING
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 
 from app.db import db
 
@@ -24,6 +24,10 @@ class ProductCategory(db.Model):
         __repr__(): Returns a string representation of the ProductCategory instance.
     """
     __tablename__ = "product_categories"
+    __table_args__ = (
+        # Serves category filters, which look up products by category
+        Index("ix_product_categories_category_id_product_id", "category_id", "product_id"),
+    )
 
     # Fields
     product_id: Mapped[UUID] = mapped_column(ForeignKey("products.id"), primary_key=True)
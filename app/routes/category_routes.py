@@ -7,6 +7,9 @@ Routes:
 - GET /categories/<category_id>:
     - retrieve_category: Retrieve a single category by its ID.
 
+Both GET routes are served from the catalog cache with an ETag and honor
+`If-None-Match` with a 304.
+
 Commented Routes for future Admin portal implementation:
 - POST /categories/:
     - create_category_endpoint: Create a new category.
@@ -29,6 +32,8 @@ from app.services.category_service import (
     # assign_category_to_product
 )
 from app.exceptions import ApplicationError
+from app.cache import cached_json_response
+from app.invalidation import CATEGORIES, category_key
 # from app.services.auth_services import token_required
 
 
@@ -41,9 +46,10 @@ def retrieve_all_categories():
     Retrieve all categories.
     """
     try:
-        categories = get_all_categories()
-        categories_data = [category.to_dict() for category in categories]
-        return jsonify(categories_data), 200
+        return cached_json_response(
+            ("categories",),
+            lambda: [category.to_dict() for category in get_all_categories()],
+            tags=(CATEGORIES,))
     except ApplicationError as e:
         return jsonify({"error": str(e)}), 400
     except Exception:
@@ -57,8 +63,9 @@ def retrieve_category(category_id):
     """
     try:
         category_id = UUID(category_id)
-        category = get_category_by_id(category_id)
-        return jsonify(category.to_dict()), 200
+        return cached_json_response(
+            ("category", category_id), lambda: get_category_by_id(category_id).to_dict(),
+            tags=(category_key(category_id),))
     except ApplicationError as e:
         return jsonify({"error": str(e)}), 404
     except Exception:
@@ -3,26 +3,40 @@ This module defines the routes for handling orders in the application.
 
 Routes:
     - GET /orders/cart-items/<user_id>: Retrieve all cart items for a user along with their respective product prices.
-    - POST /orders/: Place an order for a user.
+    - POST /orders/: Place an order for a user. Retries that send the same
+      `Idempotency-Key` header get the first response instead of placing the order again.
     - GET /orders/<user_id>: Retrieve all orders for a specific user with optional filters.
+    - GET /orders/<user_id>/<order_id>/items: Retrieve the items of one order.
 
 Functions:
     - retrieve_cart_items(user_id): Retrieve all cart items for a user along with their respective product prices.
     - create_order(): Place an order for a user.
     - retrieve_user_orders(user_id): Retrieve all orders for a specific user with optional filters.
+    - retrieve_order_items(user_id, order_id): Retrieve the items of one order.
 
 Exceptions:
     - ApplicationError: Custom application error for handling specific exceptions.
 """
 
+from uuid import UUID
 from flask import Blueprint, request, jsonify
 from app.services.order_service import (
     get_cart_items_with_prices,
+    MAX_ORDERS_PAGE_SIZE,
+    ORDER_SPARSE_FIELDS,
     place_order,
     get_user_orders,
+    get_order_items,
+    get_orders_next_cursor,
     # change_order_status
 )
-from app.exceptions import ApplicationError
+from app.services.idempotency_service import hash_request, run_idempotent
+from app.services.utility_functions import parse_fields
+from app.exceptions import (
+    ApplicationError,
+    IdempotencyKeyInProgressError,
+    IdempotencyKeyMismatchError,
+)
 from app.services.auth_services import token_required
 
 
@@ -56,6 +70,12 @@ def create_order():
     """
     Place an order for a user.
 
+    Request Headers:
+        - Idempotency-Key (str, optional): Client-generated key, unique per checkout.
+          A retry with the same key and body returns the first response without
+          placing another order; with a different body it is rejected with 422.
+          While the first request is still running, retries get 409.
+
     Request Body:
         - user_id (str): The ID of the user placing the order.
         - address_id (int): The ID of the delivery address.
@@ -71,8 +91,23 @@ def create_order():
         if not user_id or not address_id:
             return jsonify({"error": "Missing user_id or address_id."}), 400
 
-        new_order = place_order(user_id, address_id)
-        return jsonify({"order_id": str(new_order.id), "message": "Order placed successfully!"}), 201
+        def checkout():
+            new_order = place_order(user_id, address_id)
+            return {"order_id": str(new_order.id), "message": "Order placed successfully!"}, 201
+
+        idempotency_key = request.headers.get("Idempotency-Key", "").strip()
+        if not idempotency_key:
+            body, status_code = checkout()
+        elif len(idempotency_key) > 255:
+            return jsonify({"error": "Idempotency-Key must be at most 255 characters."}), 400
+        else:
+            body, status_code = run_idempotent(
+                user_id, idempotency_key, hash_request(request.get_data()), checkout)
+        return jsonify(body), status_code
+    except IdempotencyKeyInProgressError as e:
+        return jsonify({"error": str(e)}), 409
+    except IdempotencyKeyMismatchError as e:
+        return jsonify({"error": str(e)}), 422
     except ApplicationError as e:
         return jsonify({"error": str(e)}), 400
     except ValueError:
@@ -97,9 +132,19 @@ def retrieve_user_orders(user_id):
         - status (str): Filter by order status.
         - order_by (str): Field to order results by (default: "order_date").
         - order_direction (str): "asc" for ascending, "desc" for descending (default: "desc").
+        - limit (int): Page size (1-100). Enables keyset pagination.
+        - cursor (str): Opaque cursor from the previous page's `next_cursor`.
+        - view (str): "full" (default) includes every order's items; "summary" returns
+          each order's `item_count` instead, and items load per order from
+          `/orders/<user_id>/<order_id>/items`.
+        - fields (str): Comma-separated fields to return (e.g. "order_id,order_date,status"),
+          out of order_id, user_id, address_id, total_amount, order_date, status, and
+          items ("full" view) or item_count ("summary" view). `order_id` and the
+          `order_by` field are always returned.
 
     Returns:
-        JSON response with the user's orders or an error message.
+        JSON response with the user's orders or an error message. When `limit` or
+        `cursor` is given, an object with `orders` and `next_cursor` instead.
     """
     try:
         start_date = request.args.get("start_date")
@@ -109,6 +154,24 @@ def retrieve_user_orders(user_id):
         status = request.args.get("status")
         order_by = request.args.get("order_by", "order_date")
         order_direction = request.args.get("order_direction", "desc")
+        limit = request.args.get("limit")
+        cursor = request.args.get("cursor") or None
+        view = request.args.get("view", "full")
+        if view not in ("full", "summary"):
+            return jsonify({"error": "view must be 'full' or 'summary'."}), 400
+        fields = parse_fields(
+            request.args.get("fields"),
+            (*ORDER_SPARSE_FIELDS, "item_count" if view == "summary" else "items"),
+            required=("order_id",))
+        if limit:
+            try:
+                limit = int(limit)
+            except ValueError:
+                return jsonify({"error": "Invalid limit value."}), 400
+            if not 1 <= limit <= MAX_ORDERS_PAGE_SIZE:
+                return jsonify({"error": f"limit must be between 1 and {MAX_ORDERS_PAGE_SIZE}."}), 400
+        else:
+            limit = None
 
         orders = get_user_orders(
             user_id,
@@ -119,15 +182,43 @@ def retrieve_user_orders(user_id):
             status=status,
             order_by=order_by,
             order_direction=order_direction,
+            limit=limit,
+            cursor=cursor,
+            summary=view == "summary",
+            fields=fields,
         )
 
-        return jsonify(orders), 200
+        if limit is None and not cursor:
+            return jsonify(orders), 200
+        return jsonify({
+            "orders": orders,
+            "next_cursor": get_orders_next_cursor(orders, order_by, order_direction, limit)
+        }), 200
     except ApplicationError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Unexpected error occurred - {e}"}), 500
 
 
+@bp.route("/<user_id>/<order_id>/items", methods=["GET"])
+@token_required
+def retrieve_order_items(user_id, order_id):
+    """
+    Retrieve the items of one of a user's orders.
+
+    Returns:
+        JSON response with the order's items or an error message.
+    """
+    try:
+        items = get_order_items(user_id, UUID(order_id))
+        return jsonify(items), 200
+    except ValueError:
+        return jsonify({"error": "Invalid order_id."}), 400
+    except ApplicationError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        return jsonify({"error": f"Unexpected error occurred - {e}"}), 500
+
 # Route for future Admin portal implementation
 # @bp.route("/<order_id>/status", methods=["PATCH"])
 # @token_required
@@ -7,18 +7,30 @@ Routes:
         Query Parameters:
             - search (str): Search term to filter products by name or description.
             - category (str): Category to filter products.
-            - order (str): Order by field (e.g., price, name).
+            - order (str): Order by field (e.g., price, name, relevance).
+              Searches are ordered by relevance by default.
             - price (float): Maximum price to filter products.
+            - limit (int): Page size (1-100). Enables keyset pagination.
+            - cursor (str): Opaque cursor from the previous page's `next_cursor`.
+            - fields (str): Comma-separated fields to return (e.g. "id,name,price,image_url"),
+              out of id, name, description, price, stock, image_url and categories.
+              `id` and the field the products are ordered by are always returned.
         Responses:
-            - 200: List of products matching the filters.
+            - 200: List of products matching the filters. When `limit` or `cursor`
+              is given, an object with `products` and `next_cursor` instead.
+            - 304: The `If-None-Match` ETag is still current.
             - 400: Invalid query parameter value.
             - 500: Unexpected server error.
 
     - GET /products/<product_id>:
         Path Parameters:
             - product_id (UUID): Unique identifier of the product.
+        Query Parameters:
+            - fields (str): Comma-separated product columns to return. `id` is always returned.
         Responses:
             - 200: Product details.
+            - 304: The `If-None-Match` ETag is still current.
+            - 400: Unknown field.
             - 404: Product not found.
             - 500: Unexpected server error.
 
@@ -52,14 +64,24 @@ Routes:
 
 from uuid import UUID
 from flask import Blueprint, request, jsonify
+from app.models.product import Product
 from app.services.product_service import (
+    MAX_PAGE_SIZE,
+    PRODUCT_FIELDS,
+    PRODUCT_LISTING_SPARSE_FIELDS,
     get_all_products,
+    get_products_page,
+    resolve_product_order,
     get_product_by_id,
     # create_product,
     # update_product,
     # delete_product,
 )
-from app.exceptions import ApplicationError
+from app.services.utility_functions import parse_fields
+from app.exceptions import ApplicationError, InvalidFieldsError
+from app.cache import cached_json_response
+from app.serializers import serializers
+from app.invalidation import PRODUCTS, product_key
 # from app.services.auth_services import token_required
 
 bp = Blueprint("product_bp", __name__, url_prefix="/products")
@@ -77,9 +99,40 @@ def retrieve_all_products():
                 price_max = float(price_max)
             except ValueError:
                 return jsonify({"error": "Invalid price_max value."}), 400
-
-        products = get_all_products(search, category, order_by, price_max)
-        return jsonify(products), 200
+        limit = request.args.get("limit")
+        cursor = request.args.get("cursor")
+        fields = parse_fields(request.args.get("fields"), PRODUCT_LISTING_SPARSE_FIELDS, required=("id",))
+        if limit:
+            try:
+                limit = int(limit)
+            except ValueError:
+                return jsonify({"error": "Invalid limit value."}), 400
+            if not 1 <= limit <= MAX_PAGE_SIZE:
+                return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}."}), 400
+        else:
+            limit = None
+
+        # Normalize the parameters so equivalent requests share a cache entry
+        search = search.strip() if search and search.strip() else None
+        if not category or category.lower() == "all":
+            category = None
+        order_by = resolve_product_order(order_by, search)
+        price_max = price_max if price_max != "" else None
+        cursor = cursor or None
+
+        def build():
+            if limit is None and not cursor:
+                return get_all_products(search, category, order_by, price_max, fields=fields)
+            products, next_cursor = get_products_page(
+                search, category, order_by, price_max, limit=limit, cursor=cursor, fields=fields)
+            return {"products": products, "next_cursor": next_cursor}
+
+        def tags(payload):
+            products = payload if isinstance(payload, list) else payload["products"]
+            return (PRODUCTS, *(product_key(product["id"]) for product in products))
+
+        key = ("products", search, category, order_by, price_max, limit, cursor, fields)
+        return cached_json_response(key, build, tags=tags)
     except ApplicationError as e:
         return jsonify({"error": str(e)}), 400
     except Exception:
@@ -93,8 +146,14 @@ def retrieve_product(product_id):
     """
     try:
         product_id = UUID(product_id)
-        product = get_product_by_id(product_id)
-        return jsonify(product.to_dict()), 200
+        fields = parse_fields(request.args.get("fields"), PRODUCT_FIELDS, required=("id",))
+
+        def build():
+            return serializers.get(Product, fields)(get_product_by_id(product_id, fields))
+
+        return cached_json_response(("product", product_id, fields), build, tags=(product_key(product_id),))
+    except InvalidFieldsError as e:
+        return jsonify({"error": str(e)}), 400
     except ApplicationError as e:
         return jsonify({"error": str(e)}), 404
     except Exception:
@@ -0,0 +1,296 @@
+"""
+This module generates a synthetic dataset for load tests and query plan work.
+
+`flask seed` fills an empty database with categories, products, users,
+addresses, carts and orders at production scale, so that slow queries can be
+reproduced locally with production-like row counts, statistics and plans.
+
+- Popularity follows Zipf's law: the product of popularity rank k is picked
+  with probability proportional to 1 / k ** s (`zipf_exponent`, 1.1 by
+  default). The same skew applies to categories and to how many orders each
+  user places, so a few products dominate order lines and a few users have
+  long order histories, as in production.
+- Text comes from Faker. Calling Faker per row would dominate the run time, so
+  a pool of names, words and addresses is drawn once and rows combine entries
+  of the pools.
+- Rows are streamed into Postgres with `COPY ... FROM STDIN` in batches of
+  `COPY_BATCH_SIZE` rows, all in one transaction. Secondary indexes are
+  dropped during the load and rebuilt at the end, and the tables are analyzed
+  afterwards, so the planner sees the new statistics right away.
+
+The generator is deterministic: the same `seed` produces the same rows.
+
+Classes:
+    ZipfSampler: Draws items with Zipf-distributed popularity.
+
+Functions:
+    seed_database(...) -> dict[str, int]: Generate the dataset and load it into the database.
+    database_is_empty() -> bool: Whether the seeded tables are all empty.
+    truncate_seeded_tables(): Empty the seeded tables.
+"""
+import csv
+import io
+import random
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Optional, Sequence
+from uuid import UUID
+
+from faker import Faker
+from sqlalchemy import text
+
+from app.db import db
+from app.invalidation import CATEGORIES, PRODUCTS, invalidation_bus
+from app.models.order import OrderStatus
+from app.models.user import UserRole
+
+SEEDED_TABLES = (
+    "categories", "products", "product_categories", "users", "carts", "addresses",
+    "cart_items", "orders", "order_items",
+)
+
+COPY_BATCH_SIZE = 50_000
+DEFAULT_ZIPF_EXPONENT = 1.1
+TEXT_POOL_SIZE = 1000
+ORDER_HISTORY_DAYS = 730
+
+# Share of orders in each status, and of orders/carts with 1, 2, ... lines
+ORDER_STATUS_WEIGHTS = {OrderStatus.COMPLETED: 85, OrderStatus.PENDING: 10, OrderStatus.CANCELED: 5}
+ORDER_LINE_WEIGHTS = (40, 25, 15, 10, 5, 3, 2)
+CART_LINE_WEIGHTS = (50, 25, 15, 10)
+
+
+class ZipfSampler:
+    """
+    Draws items with Zipf-distributed popularity.
+
+    The first item is the most popular: the item at rank k is drawn with
+    probability proportional to 1 / k ** exponent.
+    """
+
+    def __init__(self, items: Sequence, exponent: float, rng: random.Random):
+        self.items = items
+        self._cum_weights = list(accumulate(1 / rank ** exponent for rank in range(1, len(items) + 1)))
+        self._rng = rng
+
+    def sample(self, k: int = 1) -> list:
+        """Draw `k` items, with replacement."""
+        return self._rng.choices(self.items, cum_weights=self._cum_weights, k=k)
+
+    def distinct(self, k: int) -> list:
+        """Draw up to `k` distinct items; popular items repeat, so fewer may be returned."""
+        return list(dict.fromkeys(self.sample(k)))
+
+
+class _CopyWriter:
+    """Buffers rows as CSV and loads them into a table with COPY every `COPY_BATCH_SIZE` rows."""
+
+    def __init__(self, cursor, table: str, columns: Sequence[str], depends_on: Sequence["_CopyWriter"] = ()):
+        self.rows = 0
+        self._cursor = cursor
+        self._statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        # Writers whose rows are referenced by this table's rows, flushed first
+        self._depends_on = depends_on
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._pending = 0
+
+    def write(self, row: Sequence) -> None:
+        self._writer.writerow(row)
+        self.rows += 1
+        self._pending += 1
+        if self._pending >= COPY_BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        for writer in self._depends_on:
+            writer.flush()
+        if not self._pending:
+            return
+        self._buffer.seek(0)
+        self._cursor.copy_expert(self._statement, self._buffer)
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._pending = 0
+
+
+def _uuid(rng: random.Random) -> UUID:
+    return UUID(int=rng.getrandbits(128), version=4)
+
+
+def seed_database(
+    products: int = 100_000,
+    categories: int = 100,
+    users: int = 100_000,
+    orders: int = 1_000_000,
+    cart_ratio: float = 0.2,
+    zipf_exponent: float = DEFAULT_ZIPF_EXPONENT,
+    seed: Optional[int] = 0,
+) -> dict[str, int]:
+    """
+    Generate a synthetic dataset and load it into the (empty) database.
+
+    Args:
+        products (int): Number of products.
+        categories (int): Number of categories; every product is in one to three.
+        users (int): Number of users; each gets a cart and one or two addresses.
+        orders (int): Number of orders, spread over the users with Zipf-distributed activity.
+        cart_ratio (float): Share of the users with items in their cart.
+        zipf_exponent (float): Skew of the popularity distributions.
+        seed (int, optional): Random seed; None for a different dataset on every run.
+
+    Returns:
+        dict[str, int]: The number of rows loaded into each table.
+    """
+    rng = random.Random(seed)
+    fake = Faker()
+    fake.seed_instance(seed)
+    pool = {
+        "word": [fake.word().title() for _ in range(TEXT_POOL_SIZE)],
+        "paragraph": [fake.paragraph(nb_sentences=3) for _ in range(TEXT_POOL_SIZE)],
+        "first_name": [fake.first_name() for _ in range(TEXT_POOL_SIZE)],
+        "last_name": [fake.last_name() for _ in range(TEXT_POOL_SIZE)],
+        "phone": [fake.phone_number() for _ in range(TEXT_POOL_SIZE)],
+        "street": [fake.street_name() for _ in range(TEXT_POOL_SIZE)],
+        "city": [fake.city() for _ in range(TEXT_POOL_SIZE)],
+        "state": [fake.state_abbr() for _ in range(TEXT_POOL_SIZE)],
+        "postcode": [fake.postcode() for _ in range(TEXT_POOL_SIZE)],
+    }
+
+    connection = db.session.connection()
+    cursor = connection.connection.driver_connection.cursor()
+
+    # Building an index once is much cheaper than maintaining it row by row
+    indexes = [index for table in db.metadata.sorted_tables if table.name in SEEDED_TABLES
+               for index in table.indexes]
+    for index in indexes:
+        index.drop(connection)
+
+    def writer(table, columns, depends_on=()):
+        return _CopyWriter(cursor, table, columns, depends_on)
+
+    # Categories and products; list order is popularity order
+    category_rows = writer("categories", ("id", "name", "description"))
+    category_ids = list(range(1, categories + 1))
+    for category_id in category_ids:
+        category_rows.write((category_id, f"{rng.choice(pool['word'])} {category_id}",
+                             rng.choice(pool["paragraph"])))
+    category_rows.flush()
+    popular_categories = ZipfSampler(category_ids, zipf_exponent, rng)
+
+    product_rows = writer("products", ("id", "name", "description", "price", "stock", "image_url", "is_active"))
+    product_category_rows = writer("product_categories", ("product_id", "category_id"), [product_rows])
+    catalog = []
+    for index in range(products):
+        product_id = _uuid(rng)
+        price = round(rng.lognormvariate(3.5, 0.8), 2)
+        product_rows.write((
+            product_id,
+            f"{rng.choice(pool['word'])} {rng.choice(pool['word'])} {index + 1}",
+            rng.choice(pool["paragraph"]),
+            price,
+            rng.randint(0, 500),
+            f"https://images.example.com/products/{product_id}.jpg",
+            True,
+        ))
+        for category_id in popular_categories.distinct(rng.randint(1, 3)):
+            product_category_rows.write((product_id, category_id))
+        catalog.append((product_id, price))
+    product_category_rows.flush()
+    popular_products = ZipfSampler(catalog, zipf_exponent, rng)
+
+    # Users, each with a cart and one or two addresses
+    user_rows = writer(
+        "users", ("id", "email", "first_name", "last_name", "role", "phone", "is_active"))
+    cart_rows = writer("carts", ("id", "user_id"), [user_rows])
+    address_rows = writer(
+        "addresses",
+        ("id", "user_id", "label", "house_number", "street", "city", "state", "postcode", "country"),
+        [user_rows])
+    accounts = []
+    address_id = 0
+    for index in range(users):
+        user_id = str(_uuid(rng))
+        first_name, last_name = rng.choice(pool["first_name"]), rng.choice(pool["last_name"])
+        user_rows.write((
+            user_id, f"{first_name}.{last_name}.{index + 1}@example.com".lower(), first_name, last_name,
+            UserRole.USER.name, rng.choice(pool["phone"]), True,
+        ))
+        cart_id = _uuid(rng)
+        cart_rows.write((cart_id, user_id))
+        address_ids = []
+        for label in ("Home", "Work")[:rng.choice((1, 1, 1, 2))]:
+            address_id += 1
+            address_rows.write((
+                address_id, user_id, label, rng.randint(1, 9999), rng.choice(pool["street"]),
+                rng.choice(pool["city"]), rng.choice(pool["state"]), rng.choice(pool["postcode"]), "US",
+            ))
+            address_ids.append(address_id)
+        accounts.append((user_id, cart_id, address_ids))
+    cart_rows.flush()
+    address_rows.flush()
+
+    cart_item_rows = writer("cart_items", ("cart_id", "product_id", "quantity"))
+    for _, cart_id, _ in rng.sample(accounts, int(len(accounts) * cart_ratio)):
+        lines = rng.choices(range(1, len(CART_LINE_WEIGHTS) + 1), CART_LINE_WEIGHTS)[0]
+        for product_id, _ in popular_products.distinct(lines):
+            cart_item_rows.write((cart_id, product_id, rng.randint(1, 3)))
+    cart_item_rows.flush()
+
+    # Orders: a few users place most of them, and a few products fill most lines
+    order_rows = writer("orders", ("id", "user_id", "address_id", "total_amount", "order_date", "status"))
+    order_item_rows = writer("order_items", ("order_id", "product_id", "quantity", "price"), [order_rows])
+    statuses, status_weights = zip(*ORDER_STATUS_WEIGHTS.items())
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    buyers = ZipfSampler(rng.sample(accounts, len(accounts)), zipf_exponent, rng)
+    for user_id, _, address_ids in buyers.sample(orders) if accounts and catalog else ():
+        order_id = _uuid(rng)
+        lines = rng.choices(range(1, len(ORDER_LINE_WEIGHTS) + 1), ORDER_LINE_WEIGHTS)[0]
+        items = [(product_id, rng.randint(1, 3), price) for product_id, price in popular_products.distinct(lines)]
+        order_rows.write((
+            order_id, user_id, rng.choice(address_ids),
+            round(sum(quantity * price for _, quantity, price in items), 2),
+            now - timedelta(seconds=rng.uniform(0, ORDER_HISTORY_DAYS * 86400)),
+            rng.choices(statuses, status_weights)[0].name,
+        ))
+        for product_id, quantity, price in items:
+            order_item_rows.write((order_id, product_id, quantity, price))
+    order_item_rows.flush()
+
+    for index in indexes:
+        index.create(connection)
+
+    # COPY bypassed the sequences behind the explicit IDs
+    for table in ("categories", "addresses"):
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"(SELECT coalesce(max(id), 0) + 1 FROM {table}), false)"))
+    for table in SEEDED_TABLES:
+        db.session.execute(text(f"ANALYZE {table}"))
+    invalidation_bus.publish([PRODUCTS, CATEGORIES])
+    db.session.commit()
+
+    return {
+        "categories": category_rows.rows,
+        "products": product_rows.rows,
+        "product_categories": product_category_rows.rows,
+        "users": user_rows.rows,
+        "carts": cart_rows.rows,
+        "addresses": address_rows.rows,
+        "cart_items": cart_item_rows.rows,
+        "orders": order_rows.rows,
+        "order_items": order_item_rows.rows,
+    }
+
+
+def database_is_empty() -> bool:
+    """Return whether every table loaded by `seed_database` is empty."""
+    return not any(
+        db.session.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {table})")) for table in SEEDED_TABLES)
+
+
+def truncate_seeded_tables() -> None:
+    """Delete every row of the tables loaded by `seed_database`, and of the tables referencing them."""
+    db.session.execute(text(f"TRUNCATE {', '.join(SEEDED_TABLES)} RESTART IDENTITY CASCADE"))
+    invalidation_bus.publish([PRODUCTS, CATEGORIES])
+    db.session.commit()
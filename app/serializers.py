@@ -0,0 +1,150 @@
+"""
+This module provides compiled per-model serializers.
+
+`Base.to_dict` used to inspect the mapper of every instance it serialized, and
+listings then converted UUIDs, Decimals, datetimes and Enums row by row. A
+serializer is instead generated once per model and field subset: a plain
+function returning a dict literal of the instance's attributes, with every
+conversion resolved from the column types at compile time.
+
+Values are converted to JSON-ready types:
+
+- UUID: `str`
+- Decimal: `float`
+- datetime, date, time: ISO 8601 string
+- Enum: the member's value
+
+`Base.to_dict` uses serializers compiled with `convert=False`, which keep the
+column values as they are, so the routes returning `jsonify(obj.to_dict())`
+encode exactly what they did before.
+
+`serializers.init_app(app)` compiles the full serializer of every model at
+startup; field subsets are compiled on first use and cached.
+
+Classes:
+    SerializerRegistry: Compiles and caches the serializers.
+
+Functions:
+    compile_serializer(model, fields, rename, convert) -> Callable[[object], dict]: Generate a serializer.
+"""
+import enum
+import threading
+from datetime import date, datetime, time
+from decimal import Decimal
+from operator import attrgetter
+from typing import Callable, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import inspect
+
+# Conversion of each column Python type to a JSON-ready value; types not listed are kept as is
+CONVERTERS = {
+    UUID: str,
+    Decimal: float,
+    datetime: datetime.isoformat,
+    date: date.isoformat,
+    time: time.isoformat,
+}
+
+
+def _converter(column_attr) -> Optional[Callable]:
+    """Return the conversion for a column attribute, or None if its values are already JSON-ready."""
+    try:
+        python_type = column_attr.columns[0].type.python_type
+    except NotImplementedError:
+        return None
+    if issubclass(python_type, enum.Enum):
+        return attrgetter("value")
+    for base, converter in CONVERTERS.items():
+        if issubclass(python_type, base):
+            return converter
+    return None
+
+
+def compile_serializer(model: type, fields: Optional[Iterable[str]] = None,
+                       rename: Optional[dict[str, str]] = None,
+                       convert: bool = True) -> Callable[[object], dict]:
+    """
+    Generate the serializer of `model`.
+
+    Args:
+        model (type): The mapped model class.
+        fields (Iterable[str], optional): The column attributes to include. Defaults to all of them.
+        rename (dict[str, str], optional): Output keys for some attributes, e.g. `{"id": "order_id"}`.
+        convert (bool): Convert the values to JSON-ready types. Defaults to True.
+
+    Returns:
+        Callable[[object], dict]: A function turning an instance into a JSON-ready dict.
+
+    Raises:
+        ValueError: If a field is not a column attribute of the model.
+    """
+    columns = {attr.key: attr for attr in inspect(model).column_attrs}
+    if fields is not None:
+        unknown = set(fields) - columns.keys()
+        if unknown:
+            raise ValueError(f"Unknown fields for {model.__name__}: {', '.join(sorted(unknown))}")
+    rename = rename or {}
+
+    namespace = {}
+    entries = []
+    for index, (key, attr) in enumerate(columns.items()):
+        if fields is not None and key not in fields:
+            continue
+        output_key = rename.get(key, key)
+        converter = _converter(attr) if convert else None
+        if converter is None:
+            entries.append(f"{output_key!r}: obj.{key}")
+        else:
+            namespace[f"convert_{index}"] = converter
+            entries.append(f"{output_key!r}: None if (value := obj.{key}) is None else convert_{index}(value)")
+
+    source = f"def serialize(obj):\n    return {{{', '.join(entries)}}}\n"
+    exec(compile(source, f"<serializer {model.__name__}>", "exec"), namespace)
+    return namespace["serialize"]
+
+
+class SerializerRegistry:
+    """Compiles each serializer once and caches it by model, fields and renames."""
+
+    def __init__(self):
+        self._serializers: dict[tuple, Callable[[object], dict]] = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """Compile the full serializer of every model mapped by the app's `db` and register the registry."""
+        for mapper in app.extensions["sqlalchemy"].Model.registry.mappers:
+            self.get(mapper.class_)
+            self.get(mapper.class_, convert=False)
+        app.extensions["serializers"] = self
+
+    def get(self, model: type, fields: Optional[Iterable[str]] = None,
+            rename: Optional[dict[str, str]] = None, convert: bool = True) -> Callable[[object], dict]:
+        """
+        Return the serializer of `model` for `fields`, compiling it on first use.
+
+        Args:
+            model (type): The mapped model class.
+            fields (Iterable[str], optional): The column attributes to include. Defaults to all of them.
+            rename (dict[str, str], optional): Output keys for some attributes.
+            convert (bool): Convert the values to JSON-ready types. Defaults to True.
+
+        Returns:
+            Callable[[object], dict]: A function turning an instance into a JSON-ready dict.
+
+        Raises:
+            ValueError: If a field is not a column attribute of the model.
+        """
+        key = (model, None if fields is None else frozenset(fields),
+               None if not rename else frozenset(rename.items()), convert)
+        serializer = self._serializers.get(key)
+        if serializer is None:
+            with self._lock:
+                serializer = self._serializers.get(key)
+                if serializer is None:
+                    serializer = compile_serializer(model, fields, rename, convert)
+                    self._serializers[key] = serializer
+        return serializer
+
+
+serializers = SerializerRegistry()
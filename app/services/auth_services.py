@@ -3,6 +3,10 @@ This module provides authentication services for the Tatami Store backend applic
 It includes functions to register OAuth with AWS Cognito
 and a decorator to require a valid JWT token.
 
+Classes:
+    JWKSKeyStore: Lazily fetched, kid-indexed cache of the Cognito signing keys.
+    VerifiedTokenCache: Bounded LRU cache of verified token payloads.
+
 Functions:
     register_oauth(app): Attach OAuth to the app and configure AWS Cognito.
     token_required(f): Decorator to require a valid JWT token.
@@ -12,17 +16,26 @@ Constants:
     COGNITO_REGION: AWS Cognito Region.
     COGNITO_ISSUER: URL of the AWS Cognito issuer.
     JWKS_URL: URL to fetch the JSON Web Key Set (JWKS).
+    JWKS_TTL: Seconds a fetched key set is considered fresh.
+    JWKS_MIN_REFETCH_INTERVAL: Minimum seconds between refetches triggered by an unknown kid.
+    TOKEN_CACHE_SIZE: Maximum number of verified tokens kept in memory.
 
 Dependencies:
     os.environ: To access environment variables.
     functools.wraps: To preserve the original function's metadata.
+    threading: To refresh the key set in the background.
     flask.request: To access the incoming request.
     flask.jsonify: To create JSON responses.
     requests: To make HTTP requests.
     jose.jwt: To handle JWT operations.
     authlib.integrations.flask_client.OAuth: To handle OAuth integration with Flask.
 """
+import time
+import hashlib
+import threading
+from collections import OrderedDict
 from os import environ
+from typing import Optional
 from functools import wraps
 from flask import request, jsonify
 import requests
@@ -53,8 +66,183 @@ COGNITO_POOL_ID = environ.get("AWS_COGNITO_POOL_ID")
 COGNITO_REGION = environ.get("AWS_COGNITO_REGION")
 COGNITO_ISSUER = f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_POOL_ID}"
 JWKS_URL = f"{COGNITO_ISSUER}/.well-known/jwks.json"
+JWKS_TTL = int(environ.get("JWKS_TTL", 3600))
+JWKS_MIN_REFETCH_INTERVAL = int(environ.get("JWKS_MIN_REFETCH_INTERVAL", 60))
+JWKS_FETCH_TIMEOUT = 5
+TOKEN_CACHE_SIZE = int(environ.get("TOKEN_CACHE_SIZE", 1024))
+
+
+class JWKSKeyStore:
+    """
+    Cache of the JSON Web Key Set, indexed by key ID.
+
+    Nothing is fetched until the first lookup, so importing this module (and
+    booting a worker) never touches the network. Once the cached key set is
+    older than ``ttl`` it keeps being served while a background thread fetches
+    a fresh copy. A lookup for an unknown ``kid`` triggers one synchronous
+    refetch, rate-limited to one every ``min_refetch_interval`` seconds counting
+    the first fetch, so a key rotation is picked up without a restart and forged
+    kids cannot be used to hammer the JWKS endpoint, even right after boot. A
+    failed background refresh keeps the old keys and is not retried for
+    ``min_refetch_interval`` seconds either.
+
+    Attributes:
+        url (str): The JWKS endpoint.
+        ttl (int): Seconds a fetched key set is considered fresh.
+        min_refetch_interval (int): Minimum seconds between unknown-kid refetches.
+    """
+
+    def __init__(self, url: str, ttl: int = JWKS_TTL, min_refetch_interval: int = JWKS_MIN_REFETCH_INTERVAL):
+        self.url = url
+        self.ttl = ttl
+        self.min_refetch_interval = min_refetch_interval
+        self._keys: dict[str, dict] = {}
+        self._fetched_at = None
+        self._last_refetch_at = None
+        self._refreshing = False
+        self._refresh_failed_at = None
+        self._refresh_thread = None
+        self._lock = threading.Lock()
+
+    def get_key(self, kid: str) -> Optional[dict]:
+        """
+        Return the JWK for ``kid``, fetching or refreshing the key set as needed.
+
+        Args:
+            kid (str): The key ID from the token header.
+
+        Returns:
+            Optional[dict]: The matching JWK, or None if the key set does not contain it.
+        """
+        if self._fetched_at is None:
+            with self._lock:
+                if self._fetched_at is None:
+                    # The first fetch counts as a refetch, so unknown kids right after boot wait too
+                    self._last_refetch_at = time.monotonic()
+                    self._fetch()
+        elif time.monotonic() - self._fetched_at > self.ttl:
+            self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is None and self._may_refetch():
+            with self._lock:
+                key = self._keys.get(kid)
+                if key is None and self._may_refetch():
+                    self._last_refetch_at = time.monotonic()
+                    self._fetch()
+                    key = self._keys.get(kid)
+        return key
+
+    def _may_refetch(self) -> bool:
+        return (self._last_refetch_at is None
+                or time.monotonic() - self._last_refetch_at >= self.min_refetch_interval)
+
+    def _fetch(self) -> None:
+        response = requests.get(self.url, timeout=JWKS_FETCH_TIMEOUT)
+        response.raise_for_status()
+        self._keys = {jwk["kid"]: jwk for jwk in response.json().get("keys", []) if "kid" in jwk}
+        self._fetched_at = time.monotonic()
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            if (self._refresh_failed_at is not None
+                    and time.monotonic() - self._refresh_failed_at < self.min_refetch_interval):
+                return
+            self._refreshing = True
+            self._refresh_thread = threading.Thread(target=self._background_refresh, daemon=True)
+        self._refresh_thread.start()
+
+    def _background_refresh(self) -> None:
+        failed_at = None
+        try:
+            self._fetch()
+        except (requests.RequestException, ValueError):
+            # Keep serving the stale key set; a later lookup retries once the backoff has passed.
+            failed_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._refresh_failed_at = failed_at
+                self._refreshing = False
 
-jwks = requests.get(JWKS_URL).json()
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of verified JWT payloads, keyed by the SHA-256 digest of the token.
+
+    The SPA sends the same ID token on every request until it expires, so
+    caching the payload of a token that already passed RS256 verification lets
+    repeat requests skip the signature check. Entries are only valid until the
+    token's ``exp`` claim and the least recently used entry is evicted once
+    ``max_size`` is reached.
+
+    Attributes:
+        max_size (int): Maximum number of cached tokens.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that required full verification.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """
+        Return the cached payload for ``token`` if it was verified and has not expired.
+
+        Args:
+            token (str): The raw JWT.
+
+        Returns:
+            Optional[dict]: The verified payload, or None on a miss.
+        """
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return payload
+                del self._entries[digest]
+            self.misses += 1
+            return None
+
+    def set(self, token: str, payload: dict) -> None:
+        """
+        Cache the payload of a verified token until its ``exp`` claim.
+
+        Args:
+            token (str): The raw JWT.
+            payload (dict): The payload returned by a successful verification.
+        """
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)) or self.max_size <= 0:
+            return
+        digest = self._digest(token)
+        with self._lock:
+            self._entries[digest] = (expires_at, payload)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Return the hit/miss counters and the current cache size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+jwks_store = JWKSKeyStore(JWKS_URL)
+token_cache = VerifiedTokenCache()
 
 
 def token_required(f):
@@ -66,14 +254,18 @@ def token_required(f):
             return jsonify({"error": "Authorization header missing or invalid"}), 401
 
         token = auth_header.split(" ")[1]
+        payload = token_cache.get(token)
+        if payload is not None:
+            request.user = payload
+            return f(*args, **kwargs)
+
         try:
             unverified_header = jwt.get_unverified_header(token)
             kid = unverified_header.get("kid")
-            key = None
-            for jwk in jwks.get("keys", []):
-                if jwk.get("kid") == kid:
-                    key = jwk
-                    break
+            try:
+                key = jwks_store.get_key(kid)
+            except (requests.RequestException, ValueError) as e:
+                raise JWTError(f"Unable to fetch JWKS: {str(e)}") from e
             if key is None:
                 raise JWTError("Public key not found in JWKS")
 
@@ -90,6 +282,7 @@ def token_required(f):
                 issuer=COGNITO_ISSUER,
                 options={"verify_at_hash": False}
             )
+            token_cache.set(token, payload)
             request.user = payload
         except JWTError as e:
             return jsonify({"error": f"Invalid token: {str(e)}"}), 401
@@ -9,10 +9,13 @@ Functions:
     update_cart_item_quantity(user_id: str, product_id: UUID, quantity: int) -> None:
 """
 from uuid import UUID
+from sqlalchemy import literal, select, update
+from sqlalchemy.dialects.postgresql import insert
 from app.models.cart import Cart
 from app.models.cart_item import CartItem
 from app.models.product import Product
 from app.db import db
+from app.invalidation import invalidation_bus, product_key
 from app.services.utility_functions import validate_model
 from app.exceptions import ApplicationError, StockError
 
@@ -60,6 +63,9 @@ def get_cart_items(user_id: str) -> list[dict]:
 def add_item_to_cart(user_id: str, product_id: UUID, quantity: int) -> dict:
     """
     Add an item to the user's cart and return the updated cart item details.
+    The stock is reserved with a conditional `UPDATE ... WHERE stock >= quantity`
+    and the cart item is upserted with `INSERT ... ON CONFLICT`, so concurrent
+    requests never oversell a product.
     Args:
         user_id (str): The ID of the user.
         product_id (UUID): The ID of the product to add.
@@ -70,35 +76,43 @@ def add_item_to_cart(user_id: str, product_id: UUID, quantity: int) -> dict:
         dict: A dictionary containing the updated cart item details.
     """
     try:
-        product = validate_model(product_id, Product)
+        # Reserve the stock in one conditional UPDATE, so concurrent requests can never oversell
+        reserved = db.session.execute(
+            update(Product)
+            .where(Product.id == product_id, Product.stock >= quantity)
+            .values(stock=Product.stock - quantity)
+            .returning(Product.price)
+            .execution_options(synchronize_session=False)
+        ).first()
 
-        if product.stock < quantity:
+        if reserved is None:
+            product = validate_model(product_id, Product)
             raise StockError(product.name, quantity, product.stock)
 
-        cart = db.session.query(Cart).filter_by(user_id=user_id).first()
-        if not cart:
-            raise ApplicationError("Cart not found for the user.")
-
-        cart_item = db.session.query(CartItem).filter_by(
-            cart_id=cart.id, product_id=product_id
+        # Add the quantity to the cart item, creating it if the product is not in the cart yet
+        upsert = insert(CartItem).from_select(
+            ["cart_id", "product_id", "quantity"],
+            select(Cart.id, literal(product_id), literal(quantity)).where(Cart.user_id == user_id)
+        )
+        cart_item = db.session.execute(
+            upsert.on_conflict_do_update(
+                index_elements=[CartItem.cart_id, CartItem.product_id],
+                set_={"quantity": CartItem.quantity + upsert.excluded.quantity}
+            ).returning(CartItem.cart_id, CartItem.product_id, CartItem.quantity)
         ).first()
 
-        if cart_item:
-            cart_item.quantity += quantity
-        else:
-            cart_item = CartItem(cart_id=cart.id, product_id=product_id, quantity=quantity)
-            db.session.add(cart_item)
-
-        product.stock -= quantity
-        db.session.add(product)
+        if cart_item is None:
+            raise ApplicationError("Cart not found for the user.")
 
+        # Only the stock changed: evict the listings showing this product, not every listing
+        invalidation_bus.publish([product_key(product_id)])
         db.session.commit()
 
         return {
             "cartID": str(cart_item.cart_id),
             "productID": str(cart_item.product_id),
             "amount": cart_item.quantity,
-            "price": float(product.price)
+            "price": float(reserved.price)
         }
     except Exception as e:
         db.session.rollback()
@@ -19,6 +19,7 @@ from app.models.category import Category
 from app.models.product import Product
 from app.models.product_category import ProductCategory
 from app.db import db
+from app.invalidation import CATEGORIES, PRODUCTS, category_key, invalidation_bus, product_key
 from app.services.utility_functions import validate_model
 from app.exceptions import ApplicationError
 
@@ -61,6 +62,7 @@ def assign_category_to_product(product_id: UUID, category_id: UUID) -> str:
         product_category = ProductCategory(
             product_id=product_id, category_id=category_id)
         db.session.add(product_category)
+        invalidation_bus.publish([PRODUCTS, product_key(product_id), category_key(category_id)])
         db.session.commit()
 
         category_name = category.to_dict()['name']
@@ -83,6 +85,7 @@ def create_category(category_data: dict) -> Category:
     try:
         new_category = Category.from_dict(category_data)
         db.session.add(new_category)
+        invalidation_bus.publish([CATEGORIES])
         db.session.commit()
         return new_category
     except SQLAlchemyError as e:
@@ -104,6 +107,7 @@ def update_category(category_id: UUID, category_data: dict) -> Category:
         for key, value in category_data.items():
             if hasattr(category, key):
                 setattr(category, key, value)
+        invalidation_bus.publish([CATEGORIES, PRODUCTS, category_key(category_id)])
         db.session.commit()
         return category
     except SQLAlchemyError as e:
@@ -123,6 +127,7 @@ def delete_category(category_id: UUID) -> str:
     try:
         category = validate_model(category_id, Category)
         db.session.delete(category)
+        invalidation_bus.publish([CATEGORIES, PRODUCTS, category_key(category_id)])
         db.session.commit()
         return f"Category with ID {category_id} has been deleted."
     except SQLAlchemyError as e:
@@ -0,0 +1,158 @@
+"""
+This module provides services for making non-idempotent requests safe to retry
+with an `Idempotency-Key` header.
+
+The first request with a given key claims it by inserting a row in the
+`idempotency_keys` table, in the same transaction as the work it protects. A
+concurrent retry blocks on the unique constraint until that transaction ends.
+Once the first request has finished, its response is stored, and every replay
+gets the stored response without running the request again. Keys expire after
+`IDEMPOTENCY_KEY_TTL` seconds (24 hours by default). Expired keys can be reused
+and are deleted by `flask purge-idempotency-keys`.
+
+The response is stored in a second transaction, after the request's own has
+committed. If the worker dies in between, the key is left without a response;
+such a claim is taken over by the next retry once it is older than
+`IDEMPOTENCY_CLAIM_TIMEOUT` seconds (60 by default), which must exceed the
+longest a request can run.
+
+Functions:
+    hash_request(body: bytes) -> str:
+    run_idempotent(user_id: str, key: str, request_hash: str, handler) -> tuple[dict, int]:
+    purge_expired_idempotency_keys() -> int:
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from flask import current_app
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.idempotency_key import IdempotencyKey
+from app.db import db
+from app.exceptions import IdempotencyKeyInProgressError, IdempotencyKeyMismatchError
+
+DEFAULT_IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+DEFAULT_IDEMPOTENCY_CLAIM_TIMEOUT = 60
+
+
+def hash_request(body: bytes) -> str:
+    """
+    Hash a request body, to detect an idempotency key reused for another request.
+    Args:
+        body (bytes): The raw request body.
+    Returns:
+        str: The hex SHA-256 digest of the body.
+    """
+    return hashlib.sha256(body).hexdigest()
+
+
+def _expiry_cutoff() -> datetime:
+    """Return the creation time before which idempotency keys have expired."""
+    ttl = current_app.config.get("IDEMPOTENCY_KEY_TTL", DEFAULT_IDEMPOTENCY_KEY_TTL)
+    return datetime.now(timezone.utc) - timedelta(seconds=ttl)
+
+
+def _abandoned_cutoff() -> datetime:
+    """Return the creation time before which a claim without a response was abandoned."""
+    timeout = current_app.config.get("IDEMPOTENCY_CLAIM_TIMEOUT", DEFAULT_IDEMPOTENCY_CLAIM_TIMEOUT)
+    return datetime.now(timezone.utc) - timedelta(seconds=timeout)
+
+
+def _claim(user_id: str, key: str, request_hash: str) -> Optional[int]:
+    """
+    Claim an idempotency key in the current transaction.
+
+    Inserts the key, or takes over an expired or abandoned one. Blocks while
+    another transaction holds an uncommitted claim on the same key.
+
+    Returns:
+        Optional[int]: The ID of the claimed record, or None if the key is already in use.
+    """
+    now = datetime.now(timezone.utc)
+    claim = insert(IdempotencyKey).values(
+        user_id=user_id, key=key, request_hash=request_hash, created_at=now)
+    return db.session.execute(
+        claim.on_conflict_do_update(
+            constraint="uq_idempotency_keys_user_id_key",
+            set_={
+                "request_hash": claim.excluded.request_hash,
+                "response_code": None,
+                "response_body": None,
+                "created_at": claim.excluded.created_at,
+            },
+            where=or_(
+                IdempotencyKey.created_at < _expiry_cutoff(),
+                and_(IdempotencyKey.response_code.is_(None),
+                     IdempotencyKey.created_at < _abandoned_cutoff())
+            )
+        ).returning(IdempotencyKey.id)
+    ).scalar()
+
+
+def run_idempotent(
+    user_id: str,
+    key: str,
+    request_hash: str,
+    handler: Callable[[], tuple[dict, int]]
+) -> tuple[dict, int]:
+    """
+    Run `handler` once per idempotency key and return its response, replaying it for retries.
+    Args:
+        user_id (str): The ID of the user sending the request.
+        key (str): The client-generated idempotency key.
+        request_hash (str): The hash of the request body, see `hash_request`.
+        handler (Callable[[], tuple[dict, int]]): Does the work and returns the JSON body
+            and status code. It must commit the session, which also commits the claim.
+    Raises:
+        IdempotencyKeyInProgressError: If the first request with this key has not finished.
+        IdempotencyKeyMismatchError: If the key was used for a different request.
+    Returns:
+        tuple[dict, int]: The JSON body and status code of the first response.
+    """
+    record_id = _claim(user_id, key, request_hash)
+
+    if record_id is None:
+        # Plain columns, not the entity: the rollback would expire it and reload it
+        record = db.session.execute(
+            select(IdempotencyKey.request_hash, IdempotencyKey.response_code, IdempotencyKey.response_body)
+            .filter_by(user_id=user_id, key=key)
+        ).one()
+        db.session.rollback()
+        if record.request_hash != request_hash:
+            raise IdempotencyKeyMismatchError(key)
+        if record.response_code is None:
+            raise IdempotencyKeyInProgressError(key)
+        return record.response_body, record.response_code
+
+    try:
+        body, status_code = handler()
+    except Exception:
+        # The handler rolled back its transaction, and the claim with it, unless it
+        # failed after committing; release the key so the request can be retried
+        db.session.rollback()
+        db.session.execute(delete(IdempotencyKey).where(
+            IdempotencyKey.id == record_id, IdempotencyKey.response_code.is_(None)))
+        db.session.commit()
+        raise
+
+    db.session.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.id == record_id)
+        .values(response_code=status_code, response_body=body)
+    )
+    db.session.commit()
+    return body, status_code
+
+
+def purge_expired_idempotency_keys() -> int:
+    """
+    Delete the idempotency keys older than `IDEMPOTENCY_KEY_TTL`.
+    Returns:
+        int: The number of deleted keys.
+    """
+    result = db.session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.created_at < _expiry_cutoff()))
+    db.session.commit()
+    return result.rowcount
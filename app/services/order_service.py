@@ -6,7 +6,12 @@ Functions:
     place_order(user_id: UUID, address_id: int) -> Order:
     get_user_orders(
         order_by: str = "order_date",
-        order_direction: str = "desc"
+        order_direction: str = "desc",
+        limit: int = None,
+        cursor: str = None,
+        summary: bool = False
+    get_order_items(user_id: UUID, order_id: UUID) -> list[dict]:
+    get_orders_next_cursor(orders: list[dict], ...) -> Optional[str]:
     change_order_status(order_id: UUID, new_status: str) -> Order:
         Changes the status of an order. If the order is pending and being cancelled,
         restocks the products. Raises errors for invalid status changes.
@@ -14,18 +19,47 @@ Functions:
 
 from uuid import UUID
 from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Optional
 
-from sqlalchemy import asc, desc
-from sqlalchemy.orm import joinedload
+from sqlalchemy import Integer, asc, column, delete, desc, func, insert, literal, select, tuple_, update, values
+from sqlalchemy.orm import joinedload, load_only, selectinload
 
 from app.models.order import Order, OrderStatus
 from app.models.order_item import OrderItem
+from app.models.cart import Cart
 from app.models.cart_item import CartItem
 from app.models.product import Product
 from app.models.address import Address
 from app.db import db
-from app.services.utility_functions import validate_model
-from app.exceptions import ApplicationError, StockError, EmptyCartError, AddressOwnershipError, StatusError
+from app.invalidation import invalidation_bus, product_key
+from app.serializers import serializers
+from app.services.utility_functions import validate_model, encode_cursor, decode_cursor
+from app.exceptions import (
+    ApplicationError,
+    StockError,
+    EmptyCartError,
+    AddressOwnershipError,
+    StatusError,
+    InstanceNotFoundError,
+)
+
+DEFAULT_ORDERS_PAGE_SIZE = 20
+MAX_ORDERS_PAGE_SIZE = 100
+
+# Fields orders can be sorted by, with the parser for their value in a cursor
+ORDER_SORT_KEYS = {
+    "order_date": datetime.fromisoformat,
+    "total_amount": lambda value: Decimal(str(value)),
+    "status": OrderStatus,
+}
+
+# Order and order item columns included in the order history
+ORDER_FIELDS = ("id", "user_id", "address_id", "total_amount", "order_date", "status")
+ORDER_RENAME = {"id": "order_id"}
+ORDER_ITEM_FIELDS = ("product_id", "quantity", "price")
+# Fields an order history can be trimmed to with `fields`, next to "items" or "item_count"
+ORDER_SPARSE_FIELDS = tuple(ORDER_RENAME.get(field, field) for field in ORDER_FIELDS)
 
 
 def get_cart_items_with_prices(user_id: UUID) -> list[dict]:
@@ -68,6 +102,12 @@ def place_order(user_id: UUID, address_id: int) -> Order:
     Places an order for a user. Creates an order, removes items from the user's cart,
     and adjusts stock quantities for the ordered products.
 
+    The cart's products are locked with one `SELECT ... FOR UPDATE` in product id
+    order, so concurrent checkouts always lock shared products in the same order
+    and cannot deadlock. The order items are written with one multi-row INSERT and
+    the stock with one `UPDATE ... FROM (VALUES ...)`, so the number of statements
+    does not grow with the size of the cart.
+
     Args:
         user_id (UUID): The ID of the user placing the order.
 
@@ -79,45 +119,71 @@ def place_order(user_id: UUID, address_id: int) -> Order:
     """
 
     try:
-        with db.session.begin():
-            address = validate_model(address_id, Address)
+        address = validate_model(address_id, Address)
 
-            if address.user_id != user_id:
-                raise AddressOwnershipError(address.id, user_id)
+        if address.user_id != user_id:
+            raise AddressOwnershipError(address.id, user_id)
 
-            items_with_prices = get_cart_items_with_prices(user_id)
+        cart_lines = db.session.execute(
+            select(
+                CartItem.cart_id,
+                CartItem.product_id,
+                CartItem.quantity,
+                Product.name,
+                Product.price,
+                Product.stock
+            )
+            .join(Product, CartItem.product_id == Product.id)
+            .join(Cart, CartItem.cart_id == Cart.id)
+            .where(Cart.user_id == user_id)
+            .order_by(Product.id)
+            .with_for_update(of=Product)
+        ).all()
 
-            if not items_with_prices:
-                raise EmptyCartError(user_id)
-            total_amount = sum(item['price'] * item['quantity'] for item in items_with_prices)
+        if not cart_lines:
+            raise EmptyCartError(user_id)
 
-            new_order = Order.from_dict(
-                {"user_id": user_id, "total_amount": total_amount, "address_id": address.id})
-            db.session.add(new_order)
-            db.session.flush()
+        for line in cart_lines:
+            if line.stock < line.quantity:
+                raise StockError(line.name, line.quantity, line.stock)
 
-            for item in items_with_prices:
-                product = validate_model(item['product_id'], Product)
+        total_amount = sum(line.price * line.quantity for line in cart_lines)
 
-                if product.stock < item["quantity"]:
-                    raise StockError(product.name, item["quantity"], product.stock)
+        new_order = Order.from_dict(
+            {"user_id": user_id, "total_amount": total_amount, "address_id": address.id})
+        db.session.add(new_order)
+        db.session.flush()
 
-                order_item = OrderItem.from_dict({
+        db.session.execute(
+            insert(OrderItem).values([
+                {
                     "order_id": new_order.id,
-                    "product_id": product.id,
-                    "quantity": item["quantity"],
-                    "price": product.price
-                })
-                db.session.add(order_item)
+                    "product_id": line.product_id,
+                    "quantity": line.quantity,
+                    "price": line.price
+                }
+                for line in cart_lines
+            ])
+        )
 
-                product.stock -= item["quantity"]
-                db.session.add(product)
+        ordered = values(
+            column("product_id", Product.id.type),
+            column("quantity", Integer),
+            name="ordered"
+        ).data([(line.product_id, line.quantity) for line in cart_lines])
+        db.session.execute(
+            update(Product)
+            .where(Product.id == ordered.c.product_id)
+            .values(stock=Product.stock - ordered.c.quantity)
+            .execution_options(synchronize_session=False)
+        )
 
-            cart_id = items_with_prices[0]["cart_id"]
-            db.session.query(CartItem).filter_by(cart_id=cart_id).delete()
+        db.session.execute(delete(CartItem).where(CartItem.cart_id == cart_lines[0].cart_id))
 
-            db.session.commit()
-            return new_order
+        # Only the stock changed: evict the listings showing these products, not every listing
+        invalidation_bus.publish([product_key(line.product_id) for line in cart_lines])
+        db.session.commit()
+        return new_order
 
     except Exception as e:
         db.session.rollback()
@@ -132,11 +198,24 @@ def get_user_orders(
     max_total: float = None,
     status: str = None,
     order_by: str = "order_date",
-    order_direction: str = "desc"
+    order_direction: str = "desc",
+    limit: int = None,
+    cursor: str = None,
+    summary: bool = False,
+    fields: Iterable[str] = None
 ) -> list[dict]:
     """
     Retrieves all orders placed by a specific user with optional filters and ordering.
 
+    When `limit` or `cursor` is given, returns a single page using keyset
+    pagination over `(order_by, id)`, so every page costs the same however many
+    orders the user has placed.
+
+    With `fields`, only those order columns are selected, and the items (or the
+    item counts) are only loaded if "items" (or "item_count") is one of them.
+    `order_id` and the `order_by` field are always returned, since the cursor of
+    the next page is built from them.
+
     Args:
         user_id (UUID): The ID of the user whose orders are to be retrieved.
         start_date (datetime, optional): Filter by orders placed after this date.
@@ -144,18 +223,44 @@ def get_user_orders(
         min_total (float, optional): Filter by minimum total amount.
         max_total (float, optional): Filter by maximum total amount.
         status (str, optional): Filter by order status.
-        order_by (str, optional): Field to order results by (e.g., "order_date", "total_amount").
+        order_by (str, optional): Field to order results by ("order_date", "total_amount" or "status").
         order_direction (str, optional): "asc" for ascending, "desc" for descending.
+        limit (int, optional): Maximum number of orders to return. Defaults to
+            `DEFAULT_ORDERS_PAGE_SIZE` when only `cursor` is given.
+        cursor (str, optional): Cursor returned by `get_orders_next_cursor` for the previous page.
+        summary (bool, optional): Return each order's `item_count` instead of its items,
+            from a single aggregate query that loads no `OrderItem` or `Product` rows.
+            The items can then be loaded per order with `get_order_items`.
+        fields (Iterable[str], optional): The fields of `ORDER_SPARSE_FIELDS`, plus "items" or
+            "item_count", to return. Defaults to all of them.
 
     Returns:
         list[dict]: A list of dictionaries containing order details.
     """
     try:
-        query = (
-            db.session.query(Order)
-            .filter_by(user_id=user_id)
-            .options(joinedload(Order.order_items).joinedload(OrderItem.product))
+        children = "item_count" if summary else "items"
+        include_children = fields is None or children in fields
+        order_fields = tuple(
+            field for field in ORDER_FIELDS
+            if fields is None or ORDER_RENAME.get(field, field) in fields or field in ("id", order_by)
         )
+        query = db.session.query(Order).options(
+            load_only(*(getattr(Order, field) for field in order_fields)))
+        if not include_children:
+            query = query.filter(Order.user_id == user_id)
+        elif summary:
+            item_count = func.coalesce(func.sum(OrderItem.quantity), 0).label("item_count")
+            query = (
+                query.add_columns(item_count)
+                .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+                .filter(Order.user_id == user_id)
+                .group_by(Order.id)
+            )
+        else:
+            query = (
+                query.filter(Order.user_id == user_id)
+                .options(selectinload(Order.order_items).joinedload(OrderItem.product))
+            )
 
         if start_date:
             query = query.filter(Order.order_date >= start_date)
@@ -168,64 +273,152 @@ def get_user_orders(
         if status:
             query = query.filter(Order.status == status)
 
-        order_column = getattr(Order, order_by, None)
-        if not order_column:
+        if order_by not in ORDER_SORT_KEYS:
             raise ValueError(f"Invalid order_by field: {order_by}")
+        if order_direction not in ("asc", "desc"):
+            raise ValueError(f"Invalid order_direction: {order_direction}")
+        sort_columns = [getattr(Order, order_by), Order.id]
+
+        if cursor:
+            values = decode_cursor(cursor)
+            if values.get("order") != f"{order_by}:{order_direction}":
+                raise ApplicationError("Cursor does not match the requested order.")
+            try:
+                last_row = [
+                    literal(ORDER_SORT_KEYS[order_by](values["key"]), sort_columns[0].type),
+                    literal(UUID(values["id"]), Order.id.type)
+                ]
+            except (KeyError, ValueError, TypeError, ArithmeticError) as e:
+                raise ApplicationError("Invalid cursor.") from e
+            position = tuple_(*sort_columns)
+            if order_direction == "asc":
+                query = query.filter(position > tuple_(*last_row))
+            else:
+                query = query.filter(position < tuple_(*last_row))
+
         if order_direction == "asc":
-            query = query.order_by(asc(order_column))
-        elif order_direction == "desc":
-            query = query.order_by(desc(order_column))
+            query = query.order_by(*(asc(column) for column in sort_columns))
         else:
-            raise ValueError(f"Invalid order_direction: {order_direction}")
+            query = query.order_by(*(desc(column) for column in sort_columns))
+
+        if limit is not None or cursor:
+            query = query.limit(limit or DEFAULT_ORDERS_PAGE_SIZE)
 
         orders = query.all()
 
+        serialize = serializers.get(Order, order_fields, ORDER_RENAME)
         orders_data = []
-        for order in orders:
-            order_data = {
-                "order_id": str(order.id),
-                "user_id": str(order.user_id),
-                "address_id": order.address_id,
-                "total_amount": float(order.total_amount),
-                "order_date": order.order_date.isoformat(),
-                "status": order.status.value,
-                "items": [
-                    {
-                        "product_id": str(item.product_id),
-                        "product_name": item.product.name,
-                        "quantity": item.quantity,
-                        "price": float(item.price),
-                    }
-                    for item in order.order_items
-                ],
-            }
+        for row in orders:
+            order = row[0] if summary and include_children else row
+            order_data = serialize(order)
+            if summary and include_children:
+                order_data["item_count"] = row.item_count
+            elif include_children:
+                order_data["items"] = [_order_item_to_dict(item) for item in order.order_items]
             orders_data.append(order_data)
 
         return orders_data
+    except ApplicationError:
+        raise
     except Exception as e:
         raise ApplicationError(f"Error retrieving orders for user ID {user_id}: {str(e)}") from e
 
 
+def get_order_items(user_id: UUID, order_id: UUID) -> list[dict]:
+    """
+    Retrieves the items of one of a user's orders, for the order history's summary view.
+
+    Args:
+        user_id (UUID): The ID of the user who placed the order.
+        order_id (UUID): The ID of the order.
+
+    Returns:
+        list[dict]: A list of dictionaries containing the order's items.
+
+    Raises:
+        ApplicationError: If the user has no order with this ID.
+    """
+    try:
+        order = (
+            db.session.query(Order)
+            .filter(Order.id == order_id, Order.user_id == user_id)
+            .options(selectinload(Order.order_items).joinedload(OrderItem.product))
+            .first()
+        )
+        if order is None:
+            raise InstanceNotFoundError(Order, order_id)
+        return [_order_item_to_dict(item) for item in order.order_items]
+    except Exception as e:
+        raise ApplicationError(f"Error retrieving items of order ID {order_id}: {str(e)}") from e
+
+
+def _order_item_to_dict(item: OrderItem) -> dict:
+    """Serialize an order item, with its product loaded, for the order history."""
+    item_data = serializers.get(OrderItem, ORDER_ITEM_FIELDS)(item)
+    item_data["product_name"] = item.product.name
+    return item_data
+
+
+def get_orders_next_cursor(
+    orders: list[dict],
+    order_by: str = "order_date",
+    order_direction: str = "desc",
+    limit: int = None
+) -> Optional[str]:
+    """
+    Build the cursor for the page following `orders`.
+
+    Args:
+        orders (list[dict]): A page returned by `get_user_orders`.
+        order_by (str, optional): The field the page was ordered by.
+        order_direction (str, optional): The direction the page was ordered in.
+        limit (int, optional): The page size the page was requested with.
+
+    Returns:
+        Optional[str]: The cursor for the next page, or None if this was the last page.
+    """
+    if not orders or len(orders) < (limit or DEFAULT_ORDERS_PAGE_SIZE):
+        return None
+    last = orders[-1]
+    return encode_cursor({
+        "order": f"{order_by}:{order_direction}",
+        "id": last["order_id"],
+        "key": last[order_by]
+    })
+
+
 def change_order_status(order_id: UUID, new_status: str) -> Order:
     """
     Changes the status of an order. If the order is pending and being cancelled,
-    restocks the products. Raises errors for invalid status changes.
+    restocks the products with a single `UPDATE products ... FROM order_items`.
+    Raises errors for invalid status changes.
     """
     if new_status not in OrderStatus.__members__:
         raise StatusError(new_status)
 
-    with db.session.begin():
-        order = validate_model(order_id, Order)
-        if order.status == OrderStatus.PENDING and new_status.upper() == "CANCELLED":
-            for item in order.order_items:
-                product = validate_model(item.product_id, Product)
-                product.stock += item.quantity
-                db.session.add(product)
+    try:
+        # Lock the order so that concurrent cancellations cannot restock twice
+        order = db.session.query(Order).filter_by(id=order_id).with_for_update().first()
+        if not order:
+            raise InstanceNotFoundError(Order, order_id)
+
+        if order.status == OrderStatus.PENDING and new_status == OrderStatus.CANCELED.name:
+            restocked = db.session.execute(
+                update(Product)
+                .where(Product.id == OrderItem.product_id, OrderItem.order_id == order.id)
+                .values(stock=Product.stock + OrderItem.quantity)
+                .returning(Product.id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+            invalidation_bus.publish([product_key(product_id) for product_id in restocked])
 
         elif order.status in {OrderStatus.CANCELED, OrderStatus.COMPLETED}:
             raise StatusError(order.status, new_status)
 
         order.status = OrderStatus[new_status]
         db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
 
     return order
@@ -1,12 +1,17 @@
+import re
 from uuid import UUID
-from app.models.product import Product
+from typing import Iterable, Optional
+from app.models.product import Product, PRODUCT_SEARCH_CONFIG
 from app.models.category import Category
 from app.models.product_category import ProductCategory
 from app.db import db
+from app.invalidation import PRODUCTS, invalidation_bus, product_key
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import func
-from app.services.utility_functions import validate_model
+from sqlalchemy import ARRAY, REAL, String, cast, exists, func, literal, literal_column, select, tuple_
+from sqlalchemy.orm import load_only
+from app.services.utility_functions import validate_model, encode_cursor, decode_cursor
 from app.exceptions import ApplicationError
+from app.serializers import serializers
 
 
 # def get_all_products() -> list[Product]:
@@ -20,71 +25,311 @@ from app.exceptions import ApplicationError
 #         return db.session.query(Product).all()
 #     except SQLAlchemyError as e:
 #         raise ApplicationError(f"Error retrieving products: {str(e)}")
-def get_all_products(search: str = None, category: str = None, order_by: str = None, price_max: str = None) -> dict:
 
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+# Every product column, as returned for a single product
+PRODUCT_FIELDS = tuple(Product.__table__.columns.keys())
+# Product columns included in listings, next to the category names
+PRODUCT_LISTING_FIELDS = ("id", "name", "description", "price", "stock", "image_url")
+# Fields a listing can be trimmed to with `fields`
+PRODUCT_LISTING_SPARSE_FIELDS = (*PRODUCT_LISTING_FIELDS, "categories")
+
+# Sort key and direction for each supported `order` value. Every order is
+# made total by using the product ID as a tie-breaker, which is what keyset
+# pagination needs. "relevance" is only available together with a search term.
+PRODUCT_ORDERS = {
+    "a-z": ("name", "asc"),
+    "z-a": ("name", "desc"),
+    "high": ("price", "desc"),
+    "low": ("price", "asc"),
+    "relevance": ("rank", "desc"),
+}
+
+
+def resolve_product_order(order_by: str = None, search: str = None) -> Optional[str]:
+    """
+    Normalize the requested `order` value.
+
+    Searches are ordered by relevance unless another order is requested, and
+    unknown values fall back to product ID order.
+
+    Args:
+        order_by (str, optional): The requested order.
+        search (str, optional): The search term, if any.
+
+    Returns:
+        Optional[str]: A key of `PRODUCT_ORDERS`, or None for product ID order.
+    """
+    has_search = build_search_query(search) is not None
+    if order_by == "relevance" and not has_search:
+        return None
+    if order_by in PRODUCT_ORDERS:
+        return order_by
+    return "relevance" if has_search else None
+
+
+def build_search_query(search: str = None) -> Optional[str]:
+    """
+    Turn a free-text search term into a prefix-matching `tsquery` string.
+
+    Every word must match, and each word also matches longer words starting
+    with it (e.g. "tat" matches "tatami").
+
+    Args:
+        search (str, optional): The search term entered by the user.
+
+    Returns:
+        Optional[str]: The `tsquery` source, or None if the term has no searchable words.
+    """
+    terms = re.findall(r"\w+", search or "")
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def get_all_products(
+    search: str = None,
+    category: str = None,
+    order_by: str = None,
+    price_max: str = None,
+    limit: int = None,
+    cursor: str = None,
+    fields: Iterable[str] = None
+) -> list[dict]:
+    """
+    Retrieve products with optional filters, ordering and keyset pagination.
+
+    With `fields`, only those product columns are selected, and the category
+    names are only aggregated if "categories" is one of them. The ID and the
+    column the products are ordered by are always returned, since the cursor of
+    the next page is built from them.
+
+    Args:
+        search (str, optional): Term to match against the product name or description.
+        category (str, optional): Only return products in this category ("all" disables the filter).
+        order_by (str, optional): One of "a-z", "z-a", "high", "low" or "relevance". Defaults to
+            relevance when searching and to product ID order otherwise.
+        price_max (float, optional): Only return products at or below this price.
+        limit (int, optional): Maximum number of products to return. Returns all products if
+            neither `limit` nor `cursor` is given.
+        cursor (str, optional): Cursor returned by `get_products_next_cursor` for the previous page.
+        fields (Iterable[str], optional): The fields of `PRODUCT_LISTING_SPARSE_FIELDS` to return.
+            Defaults to all of them.
+
+    Returns:
+        list[dict]: The matching products.
+
+    Raises:
+        ApplicationError: If the cursor is invalid or the query fails.
+    """
+    return _query_products(search, category, order_by, price_max, limit, cursor, fields)[0]
+
+
+def get_products_page(
+    search: str = None,
+    category: str = None,
+    order_by: str = None,
+    price_max: str = None,
+    limit: int = None,
+    cursor: str = None,
+    fields: Iterable[str] = None
+) -> tuple[list[dict], Optional[str]]:
+    """
+    Retrieve a page of products and the cursor of the next page.
+
+    Takes the same arguments as `get_all_products`. Use it rather than
+    `get_products_next_cursor` for relevance order, whose cursor needs the rank
+    of the last product, which is not part of the product dicts.
+
+    Returns:
+        tuple[list[dict], Optional[str]]: The matching products, and the cursor for the
+            next page or None if this is the last page.
+
+    Raises:
+        ApplicationError: If the cursor is invalid or the query fails.
+    """
+    products, last_rank = _query_products(search, category, order_by, price_max, limit, cursor, fields)
+    order_by = resolve_product_order(order_by, search)
+    return products, get_products_next_cursor(products, order_by, limit, last_rank)
+
+
+def _query_products(
+    search: str = None,
+    category: str = None,
+    order_by: str = None,
+    price_max: str = None,
+    limit: int = None,
+    cursor: str = None,
+    fields: Iterable[str] = None
+) -> tuple[list[dict], Optional[float]]:
+    """
+    Run the product query of `get_all_products`.
+
+    Returns:
+        tuple[list[dict], Optional[float]]: The matching products, and the relevance rank of
+            the last one when ordered by relevance.
+
+    Raises:
+        ApplicationError: If the cursor is invalid or the query fails.
+    """
     try:
-        # Build the base query with outer joins to include products without categories
-        query = (
-            db.session.query(
-                Product,
-                func.coalesce(func.array_agg(Category.name), func.cast("{}", type_=func.array_agg(Category.name).type)).label("categories")
-            )
-            .outerjoin(ProductCategory, Product.id == ProductCategory.product_id)
-            .outerjoin(Category, Category.id == ProductCategory.category_id)
-            .group_by(Product.id)
+        order_by = resolve_product_order(order_by, search)
+        sort_key, direction = PRODUCT_ORDERS.get(order_by, (None, "asc"))
+        search_query = build_search_query(search)
+        rank = None
+
+        fields = set(PRODUCT_LISTING_SPARSE_FIELDS if fields is None else fields)
+        product_fields = tuple(
+            field for field in PRODUCT_LISTING_FIELDS
+            if field in fields or field in ("id", sort_key)
         )
+        columns = [Product]
+        if "categories" in fields:
+            # Aggregate the category names per product in a correlated subquery so
+            # that ordering and LIMIT are applied to products before any aggregation.
+            categories = (
+                select(func.array_agg(Category.name))
+                .join(ProductCategory, Category.id == ProductCategory.category_id)
+                .where(ProductCategory.product_id == Product.id)
+                .correlate(Product)
+                .scalar_subquery()
+            )
+            columns.append(
+                func.coalesce(categories, literal_column("'{}'"), type_=ARRAY(String)).label("categories"))
 
-        # Filter by search term (case-insensitive) on name or description
+        search = search.strip() if search else None
         if search:
-            search_pattern = f"%{search}%"
-            query = query.filter(Product.name.ilike(search_pattern) | Product.description.ilike(search_pattern))
-        
-        # Filter by category: only return products that contain the selected category.
-        # Using the PostgreSQL operator @> to check if the array of category names contains [category]
+            substring_match = (Product.name.icontains(search, autoescape=True)
+                               | Product.description.icontains(search, autoescape=True))
+
+        # Full-text search on name and description, served by the GIN index on the same document
+        if search_query:
+            document = Product.search_document()
+            tsquery = func.to_tsquery(literal_column(f"'{PRODUCT_SEARCH_CONFIG}'"), search_query)
+            rank = func.ts_rank(document, tsquery)
+            columns.append(rank.label("rank"))
+            # A search made only of stopwords (e.g. "the") reduces to an empty tsquery, which
+            # matches nothing: fall back to a substring match on name and description for it
+            stopwords_only = func.numnode(tsquery) == 0
+            query = db.session.query(*columns).filter(
+                document.op("@@")(tsquery) | (stopwords_only & substring_match))
+        elif search:
+            # A term without any word (e.g. "!!!") has nothing to search for in full text
+            query = db.session.query(*columns).filter(substring_match)
+        else:
+            query = db.session.query(*columns)
+        query = query.options(load_only(*(getattr(Product, field) for field in product_fields)))
+
+        # Filter by category: resolve the category ID once, then keep only products with a
+        # matching product_categories row (semi-join on the (category_id, product_id) index)
         if category and category.lower() != "all":
-            query = query.having(func.array_agg(Category.name).op('@>')( [category] ))
-        
+            category_id = db.session.query(Category.id).filter(Category.name == category).scalar()
+            if category_id is None:
+                return [], None
+            query = query.filter(
+                exists().where(
+                    ProductCategory.product_id == Product.id,
+                    ProductCategory.category_id == category_id
+                )
+            )
+
         # Filter by price maximum
         if price_max is not None:
             query = query.filter(Product.price <= price_max)
 
-        # Apply ordering: options "a-z", "z-a", "high", "low"
-        if order_by:
-            if order_by == "a-z":
-                query = query.order_by(Product.name.asc())
-            elif order_by == "z-a":
-                query = query.order_by(Product.name.desc())
-            elif order_by == "high":
-                query = query.order_by(Product.price.desc())
-            elif order_by == "low":
-                query = query.order_by(Product.price.asc())
-        
-        products = query.all()
+        if sort_key == "rank":
+            sort_columns = [rank]
+        else:
+            sort_columns = [getattr(Product, sort_key)] if sort_key else []
+        sort_columns.append(Product.id)
+
+        if cursor:
+            values = decode_cursor(cursor)
+            if values.get("order") != order_by:
+                raise ApplicationError("Cursor does not match the requested order.")
+            try:
+                last_row = [values["key"]] if sort_key else []
+                last_row.append(UUID(values["id"]))
+            except (KeyError, ValueError, TypeError) as e:
+                raise ApplicationError("Invalid cursor.") from e
+            last_row = [literal(value) for value in last_row]
+            if sort_key == "rank":
+                # ts_rank returns a real; compare as real so the last row is not repeated
+                last_row[0] = cast(last_row[0], REAL)
+            position = tuple_(*sort_columns)
+            if direction == "asc":
+                query = query.filter(position > tuple_(*last_row))
+            else:
+                query = query.filter(position < tuple_(*last_row))
+
+        if direction == "asc":
+            query = query.order_by(*(column.asc() for column in sort_columns))
+        else:
+            query = query.order_by(*(column.desc() for column in sort_columns))
+
+        if limit is not None or cursor:
+            query = query.limit(limit or DEFAULT_PAGE_SIZE)
+
+        products = query.tuples().all()
 
         # Map each product row to a dictionary
-        products_list = [
-            {
-                "id": product.id,
-                "name": product.name,
-                "description": product.description,
-                "price": float(product.price),
-                "stock": product.stock,
-                "image_url": product.image_url,
-                "categories": categories if categories is not None else []
-            }
-            for product, categories in products
-        ]
-        return products_list
+        serialize = serializers.get(Product, product_fields)
+        products_list = []
+        for row in products:
+            product_data = serialize(row[0])
+            if "categories" in fields:
+                product_data["categories"] = row.categories if row.categories is not None else []
+            products_list.append(product_data)
+        last_rank = products[-1].rank if products and order_by == "relevance" else None
+        return products_list, last_rank
+    except ApplicationError:
+        raise
     except Exception as e:
         raise ApplicationError(f"Error retrieving products: {str(e)}") from e
 
 
-def get_product_by_id(product_id: UUID) -> Product:
+def get_products_next_cursor(products: list[dict], order_by: str = None, limit: int = None,
+                             last_rank: float = None) -> Optional[str]:
+    """
+    Build the cursor for the page following `products`.
+
+    Args:
+        products (list[dict]): A page returned by `get_all_products`.
+        order_by (str, optional): The order the page was returned in, as resolved by
+            `resolve_product_order`.
+        limit (int, optional): The page size the page was requested with.
+        last_rank (float, optional): The relevance rank of the last product, as returned by
+            `get_products_page`. Required for relevance order.
+
+    Returns:
+        Optional[str]: The cursor for the next page, or None if this was the last page.
+    """
+    if not products or len(products) < (limit or DEFAULT_PAGE_SIZE):
+        return None
+    if order_by not in PRODUCT_ORDERS:
+        order_by = None
+    if order_by == "relevance" and last_rank is None:
+        order_by = None
+    last = products[-1]
+    values = {"order": order_by, "id": str(last["id"])}
+    if order_by == "relevance":
+        values["key"] = last_rank
+    elif order_by:
+        values["key"] = last[PRODUCT_ORDERS[order_by][0]]
+    return encode_cursor(values)
+
+
+def get_product_by_id(product_id: UUID, fields: Iterable[str] = None) -> Product:
     """
     Retrieve a single product by its ID.
 
     Args:
         product_id (UUID): The ID of the product.
+        fields (Iterable[str], optional): Only load these columns; the others are
+            loaded on first access. Defaults to all of them.
 
     Returns:
         Product: The retrieved product.
@@ -92,7 +337,9 @@ def get_product_by_id(product_id: UUID) -> Product:
     Raises:
         ApplicationError: If the product is not found.
     """
-    return validate_model(product_id, Product)
+    if fields is None:
+        return validate_model(product_id, Product)
+    return validate_model(product_id, Product, load_only(*(getattr(Product, field) for field in fields)))
 
 
 def create_product(product_data: dict) -> Product:
@@ -108,6 +355,7 @@ def create_product(product_data: dict) -> Product:
     try:
         new_product = Product.from_dict(product_data)
         db.session.add(new_product)
+        invalidation_bus.publish([PRODUCTS])
         db.session.commit()
         return new_product
     except SQLAlchemyError as e:
@@ -131,6 +379,7 @@ def update_product(product_id: UUID, product_data: dict) -> Product:
         for key, value in product_data.items():
             if hasattr(product, key):
                 setattr(product, key, value)
+        invalidation_bus.publish([PRODUCTS, product_key(product_id)])
         db.session.commit()
         return product
     except SQLAlchemyError as e:
@@ -151,6 +400,7 @@ def delete_product(product_id: UUID) -> str:
     try:
         product = validate_model(product_id, Product)
         db.session.delete(product)
+        invalidation_bus.publish([PRODUCTS, product_key(product_id)])
         db.session.commit()
         return f"Product with ID {product_id} has been deleted."
     except SQLAlchemyError as e:
@@ -1,18 +1,21 @@
-from typing import Type
+import json
+import base64
+from typing import Iterable, Optional, Type
 from uuid import UUID
 from sqlalchemy.exc import SQLAlchemyError
 from app.db import db
 from app.models.base import Base
-from app.exceptions import InstanceNotFoundError
+from app.exceptions import ApplicationError, InstanceNotFoundError, InvalidFieldsError
 
 
-def validate_model(instance_id: UUID, model: Type[Base]) -> Base:
+def validate_model(instance_id: UUID, model: Type[Base], *options) -> Base:
     """
     Validate that a model instance exists in the database.
 
     Args:
         id (UUID): The ID of the model instance to validate.
         model (Type[Base]): The model class to query.
+        *options: Loader options for the query, e.g. `load_only(...)`.
 
     Returns:
         Base: The model instance if it exists.
@@ -21,9 +24,72 @@ def validate_model(instance_id: UUID, model: Type[Base]) -> Base:
         Exception: If the model instance is not found.
     """
     try:
-        instance = db.session.query(model).filter_by(id=instance_id).first()
+        instance = db.session.query(model).options(*options).filter_by(id=instance_id).first()
         if not instance:
             raise InstanceNotFoundError(model, instance_id)
         return instance
     except SQLAlchemyError as e:
         raise SQLAlchemyError(f"Error retrieving {model.__name__} with ID {instance_id}: {str(e)}") from e
+
+
+def encode_cursor(values: dict) -> str:
+    """
+    Encode keyset pagination state into an opaque, URL-safe cursor.
+
+    Args:
+        values (dict): JSON-serializable values identifying the last row of a page.
+
+    Returns:
+        str: The encoded cursor.
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The opaque cursor received from the client.
+
+    Returns:
+        dict: The values encoded in the cursor.
+
+    Raises:
+        ApplicationError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ApplicationError("Invalid cursor.") from e
+    if not isinstance(values, dict):
+        raise ApplicationError("Invalid cursor.")
+    return values
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str], required: Iterable[str] = ()) -> Optional[tuple[str, ...]]:
+    """
+    Parse a comma-separated `fields` query parameter (a sparse fieldset).
+
+    Args:
+        fields (str, optional): The parameter value, e.g. "id,name,price".
+        allowed (Iterable[str]): The fields the resource can return.
+        required (Iterable[str], optional): Fields always returned, e.g. the ID.
+
+    Returns:
+        Optional[tuple[str, ...]]: The requested and required fields, sorted so that equivalent
+            requests compare equal, or None if no fields were requested.
+
+    Raises:
+        InvalidFieldsError: If a requested field is not in `allowed`.
+    """
+    requested = {field.strip() for field in (fields or "").split(",")} - {""}
+    if not requested:
+        return None
+    allowed = set(allowed)
+    unknown = sorted(requested - allowed)
+    if unknown:
+        raise InvalidFieldsError(unknown)
+    return tuple(sorted(requested | set(required)))
@@ -0,0 +1,117 @@
+"""
+Compares the query plans of the legacy and current category filters of `get_all_products`.
+
+The legacy filter grouped every product with its categories and discarded the
+non-matching groups with `HAVING array_agg(categories.name) @> ARRAY[:category]`.
+The current filter resolves the category ID once and keeps products through an
+EXISTS semi-join on the (category_id, product_id) index of product_categories.
+
+Usage:
+    BENCHMARK_DATABASE_URI=postgresql://... python -m benchmarks.category_filter_plan \
+        [--products 100000] [--categories 50] [--category "Category 7"]
+
+The database is seeded with synthetic products (two categories each) if it holds
+fewer than `--products` products. Both plans are printed with EXPLAIN (ANALYZE, BUFFERS).
+"""
+import os
+import argparse
+
+from sqlalchemy import event, func, select, text
+
+from app import create_app
+from app.db import db
+from app.models.product import Product
+from app.models.category import Category
+from app.models.product_category import ProductCategory
+from app.services.product_service import get_all_products
+
+
+def seed(products: int, categories: int) -> None:
+    """Seed the catalog with synthetic products, each assigned to two categories."""
+    existing = db.session.query(func.count(Product.id)).scalar()
+    if existing >= products:
+        return
+
+    db.session.execute(text("""
+        INSERT INTO categories (name)
+        SELECT 'Category ' || g FROM generate_series(1, :categories) g
+        ON CONFLICT (name) DO NOTHING
+    """), {"categories": categories})
+    db.session.execute(text("""
+        INSERT INTO products (id, name, description, price, stock, is_active)
+        SELECT gen_random_uuid(), 'Seeded product ' || g, 'Synthetic product number ' || g,
+               round((random() * 500)::numeric, 2), (random() * 100)::int, true
+        FROM generate_series(:start, :stop) g
+    """), {"start": existing + 1, "stop": products})
+    db.session.execute(text("""
+        INSERT INTO product_categories (product_id, category_id)
+        SELECT p.id, c.id
+        FROM products p
+        CROSS JOIN LATERAL (VALUES (abs(hashtext(p.name)) % :categories + 1),
+                                   (abs(hashtext(p.name || '#')) % :categories + 1)) AS pick(n)
+        JOIN categories c ON c.name = 'Category ' || pick.n
+        ON CONFLICT DO NOTHING
+    """), {"categories": categories})
+    db.session.commit()
+    db.session.execute(text("ANALYZE products, categories, product_categories"))
+    db.session.commit()
+
+
+def legacy_category_query(category: str):
+    """The category filter as it was written before the semi-join rewrite."""
+    return (
+        select(
+            Product,
+            func.coalesce(
+                func.array_agg(Category.name),
+                func.cast("{}", type_=func.array_agg(Category.name).type)
+            ).label("categories")
+        )
+        .outerjoin(ProductCategory, Product.id == ProductCategory.product_id)
+        .outerjoin(Category, Category.id == ProductCategory.category_id)
+        .group_by(Product.id)
+        .having(func.array_agg(Category.name).op("@>")([category]))
+    )
+
+
+def explain(statement: str, parameters) -> str:
+    """Run EXPLAIN (ANALYZE, BUFFERS) for a statement and return the plan."""
+    cursor = db.session.connection().connection.cursor()
+    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+    return "\n".join(row[0] for row in cursor.fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--category", default="Category 7")
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": os.environ["BENCHMARK_DATABASE_URI"]})
+    with app.app_context():
+        db.create_all()
+        seed(args.products, args.categories)
+
+        compiled = legacy_category_query(args.category).compile(db.engine)
+        print("Legacy HAVING array_agg(...) @> filter:")
+        print(explain(str(compiled), compiled.params))
+
+        # Capture the statement the current service issues for the product list
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            captured.append((statement, parameters))
+
+        event.listen(db.engine, "before_cursor_execute", capture)
+        try:
+            get_all_products(category=args.category)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capture)
+
+        print("\nEXISTS semi-join filter:")
+        print(explain(*captured[-1]))
+
+
+if __name__ == "__main__":
+    main()
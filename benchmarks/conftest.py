@@ -0,0 +1,109 @@
+"""
+Fixtures for the service benchmarks.
+
+The benchmarks run against the database in `BENCHMARK_DATABASE_URI`, which must
+hold a dataset loaded with `flask seed`; they are skipped when it is not set.
+Benchmarks that do not use the `app` fixture (e.g. JSON encoding) always run.
+Writes go through the real services and commit. Every row they create is
+deleted afterwards and the stock they take is given back, so the seeded
+dataset stays the same from one run to the next.
+"""
+import os
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, select, update
+
+from app import create_app
+from app.db import db
+from app.models.address import Address
+from app.models.cart import Cart
+from app.models.cart_item import CartItem
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.user import User
+from app.seed import database_is_empty
+
+BENCHMARK_DATABASE_URI = os.environ.get("BENCHMARK_DATABASE_URI")
+# Stock given to the products the write benchmarks buy, so no round runs out
+BENCHMARK_STOCK = 10 ** 9
+
+
+def pytest_collection_modifyitems(config, items):
+    if BENCHMARK_DATABASE_URI:
+        return
+    skip = pytest.mark.skip(reason="BENCHMARK_DATABASE_URI is not set")
+    for item in items:
+        if "app" in getattr(item, "fixturenames", ()):
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The app, connected to the seeded benchmark database."""
+    flask_app = create_app({
+        "SQLALCHEMY_DATABASE_URI": BENCHMARK_DATABASE_URI,
+        "CACHE_INVALIDATION_LISTENER": False,
+        "METRICS_ENABLED": False,
+    })
+    with flask_app.app_context():
+        if database_is_empty():
+            pytest.exit("The benchmark database is empty; load it with `flask seed` first.", returncode=1)
+        yield flask_app
+
+
+@pytest.fixture
+def shopper(app):
+    """
+    A new user with an empty cart and an address, removed with everything they bought.
+
+    Yields:
+        tuple[str, int]: The user ID and address ID.
+    """
+    user_id = str(uuid4())
+    db.session.add(User(id=user_id, email=f"{user_id}@benchmark.example.com",
+                        first_name="Bench", last_name="Mark"))
+    db.session.add(Cart(user_id=user_id))
+    address = Address(user_id=user_id, house_number="1", street="Benchmark Way", city="Portland",
+                      state="OR", postcode="97201", country="US")
+    db.session.add(address)
+    db.session.commit()
+
+    yield user_id, address.id
+
+    db.session.rollback()
+    orders = select(Order.id).where(Order.user_id == user_id)
+    db.session.execute(delete(OrderItem).where(OrderItem.order_id.in_(orders)))
+    db.session.execute(delete(Order).where(Order.user_id == user_id))
+    db.session.execute(delete(CartItem).where(CartItem.cart.has(user_id=user_id)))
+    db.session.execute(delete(Cart).where(Cart.user_id == user_id))
+    db.session.execute(delete(Address).where(Address.user_id == user_id))
+    db.session.execute(delete(User).where(User.id == user_id))
+    db.session.commit()
+
+
+@pytest.fixture
+def stocked_products(app):
+    """
+    Return the IDs of the first `n` products, with stock for every benchmark round.
+
+    Their original stock is restored afterwards.
+    """
+    original_stock = {}
+
+    def _stocked_products(n: int) -> list:
+        rows = db.session.execute(select(Product.id, Product.stock).order_by(Product.id).limit(n)).all()
+        original_stock.update(rows)
+        db.session.execute(
+            update(Product).where(Product.id.in_([row.id for row in rows])).values(stock=BENCHMARK_STOCK))
+        db.session.commit()
+        return [row.id for row in rows]
+
+    yield _stocked_products
+
+    db.session.rollback()
+    for product_id, stock in original_stock.items():
+        db.session.execute(update(Product).where(Product.id == product_id).values(stock=stock))
+    db.session.commit()
+
@@ -0,0 +1,57 @@
+"""
+Micro-benchmark of the JSON providers on a `GET /products` payload of 10,000 products.
+
+Usage:
+    pytest benchmarks/test_json.py
+
+It needs no database. Both providers encode the same listing, built with the
+product listing serializer, so their timings compare directly.
+"""
+import random
+from uuid import UUID
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.json_provider import OrjsonProvider
+from app.models.product import Product
+from app.serializers import serializers
+from app.services.product_service import PRODUCT_LISTING_FIELDS
+
+pytest.importorskip("orjson")
+
+PAYLOAD_PRODUCTS = 10_000
+CATEGORIES = [f"Category {n}" for n in range(20)]
+
+
+def product_listing(count: int) -> list[dict]:
+    """Return a product listing of `count` synthetic products, as `get_all_products` builds it."""
+    rng = random.Random(0)
+    serialize = serializers.get(Product, PRODUCT_LISTING_FIELDS)
+    listing = []
+    for n in range(count):
+        product = Product(
+            id=UUID(int=rng.getrandbits(128), version=4),
+            name=f"Product {n}",
+            description=f"Synthetic product number {n}, hand woven from rush grass.",
+            price=rng.randint(100, 50_000) / 100,
+            stock=rng.randint(0, 100),
+            image_url=f"https://images.example.com/products/{n}.jpg",
+        )
+        listing.append({**serialize(product), "categories": rng.sample(CATEGORIES, 2)})
+    return listing
+
+
+@pytest.fixture(scope="module")
+def listing():
+    return product_listing(PAYLOAD_PRODUCTS)
+
+
+@pytest.mark.parametrize("provider_class", [DefaultJSONProvider, OrjsonProvider],
+                         ids=["stdlib", "orjson"])
+def test_json_response(benchmark, listing, provider_class):
+    flask_app = Flask(__name__)
+    provider = provider_class(flask_app)
+    benchmark.extra_info["bytes"] = len(provider.response(listing).get_data())
+    benchmark(provider.response, listing)
@@ -0,0 +1,121 @@
+"""
+Service-level benchmarks, run against a database seeded with `flask seed`.
+
+Usage:
+    BENCHMARK_DATABASE_URI=postgresql://... pytest benchmarks --benchmark-autosave
+
+`--benchmark-autosave` writes the results as JSON under `.benchmarks/`, tagged
+with the commit. Compare two runs with `pytest-benchmark compare`, or fail a run
+that regressed against the last saved one with
+`--benchmark-compare --benchmark-compare-fail=mean:10%`.
+
+Each benchmark also records the number of SQL statements of one call in its
+`extra_info`, so a query regression shows up even when timings are noisy.
+"""
+from itertools import product as combinations
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.db import db
+from app.instrumentation import track_queries
+from app.models.cart import Cart
+from app.models.cart_item import CartItem
+from app.models.category import Category
+from app.models.order import Order
+from app.models.product import Product
+from app.models.product_category import ProductCategory
+from app.services.cart_service import add_item_to_cart, get_cart_items
+from app.services.order_service import get_user_orders, place_order
+from app.services.product_service import DEFAULT_PAGE_SIZE, PRODUCT_ORDERS, get_all_products
+
+PRICE_MAX = 50
+
+
+def record_queries(benchmark, function, *args, **kwargs) -> None:
+    """Store the number of statements of one call in the benchmark's `extra_info`."""
+    with track_queries() as tracker:
+        function(*args, **kwargs)
+    benchmark.extra_info["queries"] = tracker.count
+
+
+def fill_cart(user_id: str, product_ids: list) -> None:
+    """Put one of each product in the user's cart, bypassing the cart service."""
+    cart_id = db.session.scalar(select(Cart.id).where(Cart.user_id == user_id))
+    db.session.execute(insert(CartItem), [
+        {"cart_id": cart_id, "product_id": product_id, "quantity": 1} for product_id in product_ids
+    ])
+    db.session.commit()
+
+
+def user_with_orders(n: int) -> str:
+    """Return the seeded user whose number of orders is closest to `n`."""
+    return db.session.scalar(
+        select(Order.user_id).group_by(Order.user_id)
+        .order_by(func.abs(func.count(Order.id) - n)).limit(1))
+
+
+@pytest.fixture(scope="module")
+def catalog_filters(app):
+    """A search term and the most popular category of the seeded catalog."""
+    search = db.session.scalar(select(Product.name).order_by(Product.id).limit(1)).split()[0]
+    category = db.session.scalar(
+        select(Category.name).join(ProductCategory, ProductCategory.category_id == Category.id)
+        .group_by(Category.id).order_by(func.count().desc()).limit(1))
+    return {"search": search, "category": category}
+
+
+@pytest.mark.parametrize("order_by", [None, *PRODUCT_ORDERS])
+@pytest.mark.parametrize("search, category, price_max", list(combinations((False, True), repeat=3)),
+                         ids=lambda enabled: "on" if enabled else "off")
+def test_get_all_products(benchmark, catalog_filters, search, category, price_max, order_by):
+    """One page of products, for every combination of filters and sort order."""
+    kwargs = {
+        "search": catalog_filters["search"] if search else None,
+        "category": catalog_filters["category"] if category else None,
+        "price_max": PRICE_MAX if price_max else None,
+        "order_by": order_by,
+        "limit": DEFAULT_PAGE_SIZE,
+    }
+    record_queries(benchmark, get_all_products, **kwargs)
+    benchmark(get_all_products, **kwargs)
+
+
+def test_get_cart_items(benchmark, shopper, stocked_products):
+    user_id, _ = shopper
+    fill_cart(user_id, stocked_products(10))
+
+    record_queries(benchmark, get_cart_items, user_id)
+    benchmark(get_cart_items, user_id)
+
+
+def test_add_item_to_cart(benchmark, shopper, stocked_products):
+    """Adding the same product again, which updates the existing cart line."""
+    user_id, _ = shopper
+    [product_id] = stocked_products(1)
+
+    record_queries(benchmark, add_item_to_cart, user_id, product_id, 1)
+    benchmark(add_item_to_cart, user_id, product_id, 1)
+
+
+@pytest.mark.parametrize("lines", [1, 10, 100])
+def test_place_order(benchmark, shopper, stocked_products, lines):
+    user_id, address_id = shopper
+    product_ids = stocked_products(lines)
+
+    def setup():
+        fill_cart(user_id, product_ids)
+        return (user_id, address_id), {}
+
+    setup()
+    record_queries(benchmark, place_order, user_id, address_id)
+    benchmark.pedantic(place_order, setup=setup, rounds=50)
+
+
+@pytest.mark.parametrize("limit", [None, 20], ids=["all", "page"])
+@pytest.mark.parametrize("orders", [10, 1000])
+def test_get_user_orders(benchmark, app, orders, limit):
+    user_id = user_with_orders(orders)
+
+    record_queries(benchmark, get_user_orders, user_id, limit=limit)
+    benchmark(get_user_orders, user_id, limit=limit)
@@ -0,0 +1,22 @@
+"""
+gunicorn settings, loaded automatically by `gunicorn "app:create_app()"`.
+
+When `PROMETHEUS_MULTIPROC_DIR` is set, every worker writes its metrics to
+files in that directory (see `app/metrics.py`). The directory is emptied when
+the master starts, and the live gauges of a worker are dropped when it exits.
+"""
+import os
+import shutil
+
+
+def on_starting(server):
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
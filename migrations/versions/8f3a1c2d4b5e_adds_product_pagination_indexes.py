@@ -0,0 +1,28 @@
+"""Adds product pagination indexes
+
+Revision ID: 8f3a1c2d4b5e
+Revises: 2ce897ad2312
+Create Date: 2026-10-17 09:12:41.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f3a1c2d4b5e'
+down_revision = '2ce897ad2312'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_name_id', ['name', 'id'], unique=False)
+        batch_op.create_index('ix_products_price_id', ['price', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_price_id')
+        batch_op.drop_index('ix_products_name_id')
@@ -0,0 +1,31 @@
+"""Adds product full-text search index
+
+Revision ID: b71e4d9a0c3f
+Revises: 8f3a1c2d4b5e
+Create Date: 2026-10-17 11:03:27.904112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71e4d9a0c3f'
+down_revision = '8f3a1c2d4b5e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Must match Product.search_document() so the planner can use the index
+    op.create_index(
+        'ix_products_search_document',
+        'products',
+        [sa.text("to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, ''))")],
+        unique=False,
+        postgresql_using='gin'
+    )
+
+
+def downgrade():
+    op.drop_index('ix_products_search_document', table_name='products', postgresql_using='gin')
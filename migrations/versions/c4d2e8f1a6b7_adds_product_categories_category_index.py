@@ -0,0 +1,27 @@
+"""Adds product_categories category index
+
+Revision ID: c4d2e8f1a6b7
+Revises: b71e4d9a0c3f
+Create Date: 2026-10-17 13:48:09.266431
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d2e8f1a6b7'
+down_revision = 'b71e4d9a0c3f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('product_categories', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_product_categories_category_id_product_id', ['category_id', 'product_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('product_categories', schema=None) as batch_op:
+        batch_op.drop_index('ix_product_categories_category_id_product_id')
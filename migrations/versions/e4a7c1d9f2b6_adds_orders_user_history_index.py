@@ -0,0 +1,29 @@
+"""Adds orders user history index
+
+Revision ID: e4a7c1d9f2b6
+Revises: d9e3f7a2b8c1
+Create Date: 2026-10-17 15:58:27.904113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7c1d9f2b6'
+down_revision = 'd9e3f7a2b8c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_orders_user_id_order_date_id',
+            ['user_id', sa.text('order_date DESC'), sa.text('id DESC')],
+            unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_user_id_order_date_id')
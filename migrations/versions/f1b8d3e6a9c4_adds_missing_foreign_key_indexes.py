@@ -0,0 +1,44 @@
+"""Adds missing foreign key indexes
+
+Revision ID: f1b8d3e6a9c4
+Revises: e4a7c1d9f2b6
+Create Date: 2026-10-17 16:31:05.117482
+
+The indexes are built CONCURRENTLY so that the tables stay writable during the
+migration. CREATE INDEX CONCURRENTLY cannot run inside a transaction, hence the
+autocommit block. If a concurrent build fails, it leaves an INVALID index behind;
+drop it and run the migration again.
+
+orders.user_id and product_categories.category_id are already covered by
+ix_orders_user_id_order_date_id and ix_product_categories_category_id_product_id.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b8d3e6a9c4'
+down_revision = 'e4a7c1d9f2b6'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_cart_items_product_id', 'cart_items', ['product_id']),
+    ('ix_order_items_product_id', 'order_items', ['product_id']),
+    ('ix_orders_address_id', 'orders', ['address_id']),
+    ('ix_addresses_user_id', 'addresses', ['user_id']),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
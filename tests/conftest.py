@@ -1,28 +1,62 @@
 import os
+from contextlib import contextmanager
 from uuid import uuid4
 
 import pytest
 from dotenv import load_dotenv
 from flask import request_finished
 from faker import Faker
+from flask.globals import app_ctx
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app import create_app
-from app.db import db
+from app.db import RoutingSession, db
+from app.instrumentation import track_queries
 from app.models.user import User, UserRole
 from app.models.cart import Cart
 from app.models.product import Product
 from app.models.order_item import OrderItem
 from app.models.address import Address
+from tests.helpers import truncate_tables, worker_database_uri
 
 load_dotenv()
 faker = Faker()
 
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "commits: the test needs real commits (e.g. other connections or threads must see "
+        "its data); its tables are truncated afterwards instead of rolled back")
+
+
+@pytest.fixture(scope="session")
+def database_uri():
+    """The test database of this worker, with the schema created once for the whole session."""
+    database_uri = worker_database_uri(os.environ.get('SQLALCHEMY_TEST_DATABASE_URI'))
+    engine = create_engine(database_uri, poolclass=NullPool)
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    yield database_uri
+    db.metadata.drop_all(engine)
+    engine.dispose()
+
+
 @pytest.fixture
-def app():
-    """Create and configure a new instance of the Flask application for testing."""
+def app(request, database_uri):
+    """
+    Create and configure a new instance of the Flask application for testing.
+
+    Each test runs in an outer transaction that is rolled back when it ends.
+    The session joins it through SAVEPOINTs, so code under test can commit and
+    roll back as usual without anything reaching the database. Tests marked
+    `commits` run without the outer transaction and truncate the tables instead.
+    """
     test_config = {
         "TESTING": True,
-        "SQLALCHEMY_DATABASE_URI": os.environ.get('SQLALCHEMY_TEST_DATABASE_URI')
+        "SQLALCHEMY_DATABASE_URI": database_uri
     }
     flask_app = create_app(test_config)
 
@@ -31,11 +65,29 @@ def app():
         db.session.remove()
 
     with flask_app.app_context():
-        db.create_all()
-        yield flask_app
+        if request.node.get_closest_marker("commits"):
+            try:
+                yield flask_app
+            finally:
+                db.session.remove()
+                with db.engine.begin() as connection:
+                    truncate_tables(connection)
+            return
 
-    with flask_app.app_context():
-        db.drop_all()
+        session = db.session
+        with db.engine.connect() as connection:
+            transaction = connection.begin()
+            # Scoped to the app context, like the session Flask-SQLAlchemy creates
+            db.session = scoped_session(
+                sessionmaker(class_=RoutingSession, db=db, bind=connection,
+                             join_transaction_mode="create_savepoint"),
+                scopefunc=lambda: id(app_ctx._get_current_object()))
+            try:
+                yield flask_app
+            finally:
+                db.session.remove()
+                db.session = session
+                transaction.rollback()
 
 
 @pytest.fixture
@@ -43,6 +95,26 @@ def client(app):
     return app.test_client()
 
 
+@pytest.fixture
+def assert_max_queries():
+    """
+    Fixture to pin the query budget of a block of code.
+
+    Usage:
+        with assert_max_queries(2):
+            get_cart_items(user_id)
+    """
+    @contextmanager
+    def _assert_max_queries(n):
+        with track_queries() as tracker:
+            yield tracker
+        assert tracker.count <= n, (
+            f"{tracker.count} queries executed, the budget is {n}:\n"
+            + "\n".join(f"{count}x {statement}" for statement, count in tracker.statements.items())
+        )
+    return _assert_max_queries
+
+
 @pytest.fixture
 def create_product():
     """Fixture to create a product."""
@@ -61,6 +133,22 @@ def create_product():
     return _create_product
 
 
+@pytest.fixture
+def create_products():
+    """Fixture to create many products with a single INSERT."""
+    def _create_products(count, price=9.99, description=None, stock=0):
+        ids = db.session.scalars(insert(Product).returning(Product.id), [
+            {"name": f"test_item_{uuid4()}", "price": price, "description": description, "stock": stock}
+            for _ in range(count)
+        ]).all()
+        db.session.commit()
+        # Load them back in one query rather than one refresh per expired product
+        products = {product.id: product for product in
+                    db.session.scalars(select(Product).where(Product.id.in_(ids)))}
+        return [products[product_id] for product_id in ids]
+    return _create_products
+
+
 @pytest.fixture
 def create_address():
     """Fixture to create an address without requiring a user."""
@@ -68,7 +156,7 @@ def create_address():
         user_id,
         label="Home",
         house_number=None,
-        road=None,
+        street=None,
         city=None,
         state=None,
         postcode=None,
@@ -78,7 +166,7 @@ def create_address():
             raise ValueError("Missing required field: user_id")
 
         house_number = house_number or faker.building_number()
-        road = road or faker.street_name()
+        street = street or faker.street_name()
         city = city or faker.city()
         state = state or faker.state()
         postcode = postcode or faker.postcode()
@@ -88,7 +176,7 @@ def create_address():
             user_id=user_id,
             label=label,
             house_number=house_number,
-            road=road,
+            street=street,
             city=city,
             state=state,
             postcode=postcode,
@@ -103,13 +191,15 @@ def create_address():
 @pytest.fixture
 def create_user(create_address):
     """Fixture to create a user with an associated address."""
-    def _create_user(email=None, first_name=None, last_name=None, phone=None, role=UserRole.USER):
+    def _create_user(email=None, first_name=None, last_name=None, phone=None, role=UserRole.USER, id=None):
+        id = id or str(uuid4())
         email = email or faker.email()
         first_name = first_name or faker.first_name()
         last_name = last_name or faker.last_name()
         phone = phone or faker.phone_number()
 
         user = User(
+            id=id,
             email=email,
             first_name=first_name,
             last_name=last_name,
@@ -139,6 +229,30 @@ def create_cart(create_user):
     return _create_cart
 
 
+@pytest.fixture
+def create_carts():
+    """Fixture to create many users, each with an address and a cart, with one INSERT per table."""
+    def _create_carts(count):
+        user_ids = [str(uuid4()) for _ in range(count)]
+        db.session.execute(insert(User), [
+            {"id": user_id, "email": f"{user_id}@example.com", "first_name": faker.first_name(),
+             "last_name": faker.last_name(), "phone": faker.phone_number(), "role": UserRole.USER}
+            for user_id in user_ids
+        ])
+        db.session.execute(insert(Address), [
+            {"user_id": user_id, "label": "Home", "house_number": faker.building_number(),
+             "street": faker.street_name(), "city": faker.city(), "state": faker.state(),
+             "postcode": faker.postcode(), "country": faker.country()}
+            for user_id in user_ids
+        ])
+        cart_ids = db.session.scalars(
+            insert(Cart).returning(Cart.id), [{"user_id": user_id} for user_id in user_ids]).all()
+        db.session.commit()
+        carts = {cart.id: cart for cart in db.session.scalars(select(Cart).where(Cart.id.in_(cart_ids)))}
+        return [carts[cart_id] for cart_id in cart_ids]
+    return _create_carts
+
+
 @pytest.fixture
 def multiple_users(create_user):
     """Fixture to create multiple users with associated addresses."""
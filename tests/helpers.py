@@ -0,0 +1,43 @@
+"""
+Database helpers shared by the test fixtures.
+
+Functions:
+    worker_database_uri(database_uri) -> str: The database of this pytest-xdist worker.
+    truncate_tables(connection): Delete every row of every table.
+"""
+import os
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+from app.db import db
+
+
+def worker_database_uri(database_uri: str) -> str:
+    """
+    Return the database of this pytest-xdist worker, creating it if needed.
+
+    Every worker gets its own copy of the database (e.g. `tatami_test_gw0`), so
+    workers never share rows, locks or schema changes. Without xdist the
+    database is used as is.
+    """
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if not worker:
+        return database_uri
+    url = make_url(database_uri)
+    worker_url = url.set(database=f"{url.database}_{worker}")
+    engine = create_engine(url, isolation_level="AUTOCOMMIT", poolclass=NullPool)
+    with engine.connect() as connection:
+        exists = connection.scalar(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": worker_url.database})
+        if not exists:
+            connection.execute(text(f'CREATE DATABASE "{worker_url.database}"'))
+    engine.dispose()
+    return worker_url.render_as_string(hide_password=False)
+
+
+def truncate_tables(connection) -> None:
+    """Delete every row of every table."""
+    tables = ", ".join(table.name for table in db.metadata.sorted_tables)
+    connection.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
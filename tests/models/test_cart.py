@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.db import db
+from app.models.cart_item import CartItem
+from app.models.product import Product
+from app.exceptions import ApplicationError
+from app.services.cart_service import add_item_to_cart, get_cart_items
+
+
+def test_add_item_to_cart_upserts_cart_item(app, create_cart, create_product):
+    cart = create_cart()
+    product = create_product(stock=10, price=4.5)
+
+    add_item_to_cart(cart.user_id, product.id, 2)
+    result = add_item_to_cart(cart.user_id, product.id, 3)
+
+    assert result == {
+        "cartID": str(cart.id),
+        "productID": str(product.id),
+        "amount": 5,
+        "price": 4.5
+    }
+    assert db.session.get(Product, product.id).stock == 5
+
+
+def test_add_item_to_cart_rejects_insufficient_stock(app, create_cart, create_product):
+    cart = create_cart()
+    product = create_product(stock=1)
+
+    with pytest.raises(ApplicationError, match="Insufficient stock"):
+        add_item_to_cart(cart.user_id, product.id, 2)
+
+    assert db.session.get(Product, product.id).stock == 1
+    assert db.session.query(CartItem).count() == 0
+
+
+@pytest.mark.commits
+def test_add_item_to_cart_does_not_oversell_under_concurrency(app, create_carts, create_product):
+    stock = 25
+    carts = create_carts(10)
+    product = create_product(stock=stock)
+    product_id = product.id
+    user_ids = [cart.user_id for cart in carts]
+
+    def reserve(attempt):
+        with app.app_context():
+            try:
+                add_item_to_cart(user_ids[attempt % len(user_ids)], product_id, 1)
+                return True
+            except ApplicationError:
+                return False
+            finally:
+                db.session.remove()
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(reserve, range(100)))
+
+    db.session.expire_all()
+    reserved = db.session.query(db.func.sum(CartItem.quantity)).scalar()
+    assert sum(results) == stock
+    assert reserved == stock
+    assert db.session.get(Product, product_id).stock == 0
+
+
+def test_cart_service_query_budgets(app, create_cart, create_products, assert_max_queries):
+    cart = create_cart()
+    products = create_products(5, stock=10)
+    user_id, product_ids = cart.user_id, [product.id for product in products]
+    db.session.expire_all()
+
+    for product_id in product_ids:
+        with assert_max_queries(3):
+            add_item_to_cart(user_id, product_id, 1)
+
+    with assert_max_queries(1):
+        assert len(get_cart_items(user_id)) == 5
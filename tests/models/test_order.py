@@ -1,10 +1,11 @@
-import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from uuid import uuid4
 
 import pytest
-from dotenv import load_dotenv
-from flask import request_finished
 from faker import Faker
+from sqlalchemy import update
 
 from app import create_app
 from app.db import db
@@ -14,47 +15,29 @@ from app.models.product import Product
 from app.models.order_item import OrderItem
 from app.models.order import Order, OrderStatus
 from app.models.address import Address
-
-load_dotenv()
-
-
-@pytest.fixture
-def app():
-    """
-    Create and configure a new instance of the Flask application for testing.
-
-    This fixture sets up the Flask application with a test configuration,
-    including setting the `TESTING` flag to True and configuring the
-    SQLAlchemy database URI from an environment variable. It also ensures
-    that the database is created before tests run and dropped after tests
-    complete.
-
-    Yields:
-        flask.Flask: The configured Flask application instance.
-    """
-    # create the app with a test configuration
-    test_config = {
-        "TESTING": True,
-        "SQLALCHEMY_DATABASE_URI": os.environ.get('SQLALCHEMY_TEST_DATABASE_URI')
-    }
-    flask_app = create_app(test_config)
-
-    @request_finished.connect_via(flask_app)
-    def expire_session(sender, response, **extra):
-        db.session.remove()
-
-    with flask_app.app_context():
-        db.create_all()
-        yield flask_app
-
-    # close and remove the temporary database
-    with flask_app.app_context():
-        db.drop_all()
-
-
-@pytest.fixture
-def client(app):
-    return app.test_client()
+from app.models.cart_item import CartItem
+from app.models.idempotency_key import IdempotencyKey
+from app.exceptions import (
+    ApplicationError,
+    IdempotencyKeyInProgressError,
+    IdempotencyKeyMismatchError,
+    StatusError,
+)
+from app.instrumentation import track_queries
+from app.services import auth_services
+from app.services.auth_services import VerifiedTokenCache
+from app.services.order_service import (
+    place_order,
+    get_user_orders,
+    get_order_items,
+    get_orders_next_cursor,
+    change_order_status,
+)
+from app.services.idempotency_service import (
+    hash_request,
+    purge_expired_idempotency_keys,
+    run_idempotent,
+)
 
 
 @pytest.fixture
@@ -85,7 +68,7 @@ def create_address():
         user_id=None,
         label="Home",
         house_number=None,
-        road=None,
+        street=None,
         city=None,
         state=None,
         postcode=None,
@@ -93,8 +76,8 @@ def create_address():
     ):
         if house_number is None:
             house_number = faker.building_number()
-        if road is None:
-            road = faker.street_name()
+        if street is None:
+            street = faker.street_name()
         if city is None:
             city = faker.city()
         if state is None:
@@ -108,7 +91,7 @@ def create_address():
             user_id=user_id,
             label=label,
             house_number=house_number,
-            road=road,
+            street=street,
             city=city,
             state=state,
             postcode=postcode,
@@ -128,8 +111,11 @@ def create_user():
         first_name=None,
         last_name=None,
         phone=None,
-        role=UserRole.USER
+        role=UserRole.USER,
+        id=None
     ):
+        if id is None:
+            id = str(uuid4())
         if email is None:
             email = faker.email()
         if first_name is None:
@@ -140,6 +126,7 @@ def create_user():
             phone = faker.phone_number()
 
         user = User(
+            id=id,
             email=email,
             first_name=first_name,
             last_name=last_name,
@@ -253,4 +240,320 @@ def create_order_item(create_product, create_order):
         db.session.add(order_item)
         db.session.commit()
         return order_item
-    return _create_order_item
\ No newline at end of file
+    return _create_order_item
+
+@pytest.fixture
+def filled_cart(create_cart, create_product):
+    """Fixture to create a user's cart holding the given products."""
+    def _filled_cart(products, quantity=1, user=None):
+        cart = create_cart(user)
+        for product in products:
+            db.session.add(CartItem(cart_id=cart.id, product_id=product.id, quantity=quantity))
+        db.session.commit()
+        return cart
+    return _filled_cart
+
+
+def test_place_order(app, filled_cart, create_products, create_address):
+    products = create_products(3, stock=5, price=2.5)
+    cart = filled_cart(products, quantity=2)
+    address = create_address(user_id=cart.user_id)
+
+    order = place_order(cart.user_id, address.id)
+
+    assert float(order.total_amount) == 15.0
+    assert sorted(item.product_id for item in order.order_items) == sorted(p.id for p in products)
+    assert all(db.session.get(Product, p.id).stock == 3 for p in products)
+    assert db.session.query(CartItem).filter_by(cart_id=cart.id).count() == 0
+
+
+def test_place_order_insufficient_stock(app, filled_cart, create_product, create_address):
+    in_stock, sold_out = create_product(stock=5), create_product(stock=1)
+    cart = filled_cart([in_stock, sold_out], quantity=2)
+    address = create_address(user_id=cart.user_id)
+
+    with pytest.raises(ApplicationError, match="Insufficient stock"):
+        place_order(cart.user_id, address.id)
+
+    assert db.session.get(Product, in_stock.id).stock == 5
+    assert db.session.query(CartItem).filter_by(cart_id=cart.id).count() == 2
+    assert db.session.query(Order).count() == 0
+
+
+def test_place_order_statement_count_does_not_grow_with_cart(app, filled_cart, create_products, create_address):
+    def checkout(lines):
+        cart = filled_cart(create_products(lines, stock=10))
+        address = create_address(user_id=cart.user_id)
+        db.session.expire_all()
+        with track_queries() as tracker:
+            place_order(cart.user_id, address.id)
+        return tracker.count
+
+    assert checkout(1) == checkout(20)
+
+
+@pytest.mark.commits
+def test_concurrent_checkouts_do_not_deadlock(app, filled_cart, create_products, create_address):
+    products = create_products(5, stock=100)
+    checkouts = []
+    for i in range(8):
+        # Every cart holds the same products, added in a different order
+        cart = filled_cart(products[i % 5:] + products[:i % 5])
+        checkouts.append((cart.user_id, create_address(user_id=cart.user_id).id))
+
+    def checkout(args):
+        with app.app_context():
+            try:
+                place_order(*args)
+            finally:
+                db.session.remove()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(checkout, checkouts))
+
+    db.session.expire_all()
+    assert db.session.query(Order).count() == 8
+    assert all(db.session.get(Product, p.id).stock == 92 for p in products)
+
+
+def test_idempotent_checkout_replays_first_response(app, filled_cart, create_product, create_address):
+    product = create_product(stock=5)
+    cart = filled_cart([product])
+    address = create_address(user_id=cart.user_id)
+    request_hash = hash_request(b'{"address_id": 1}')
+
+    def checkout():
+        order = place_order(cart.user_id, address.id)
+        return {"order_id": str(order.id)}, 201
+
+    first = run_idempotent(cart.user_id, "checkout-1", request_hash, checkout)
+    user_id = cart.user_id
+
+    with track_queries() as tracker:
+        replay = run_idempotent(user_id, "checkout-1", request_hash, checkout)
+
+    assert replay == first
+    # The claim attempt and one read of the stored response
+    assert tracker.count == 2
+    assert db.session.query(Order).count() == 1
+    assert db.session.get(Product, product.id).stock == 4
+    assert not any("products" in s or "cart_items" in s for s in tracker.statements)
+
+    with pytest.raises(IdempotencyKeyMismatchError):
+        run_idempotent(cart.user_id, "checkout-1", hash_request(b"other"), checkout)
+
+
+def test_idempotency_key_is_released_when_checkout_fails(app, create_user, create_address):
+    user = create_user()
+    address = create_address(user_id=user.id)
+
+    def checkout():
+        order = place_order(user.id, address.id)
+        return {"order_id": str(order.id)}, 201
+
+    for _ in range(2):
+        with pytest.raises(ApplicationError, match="is empty"):
+            run_idempotent(user.id, "checkout-1", hash_request(b""), checkout)
+
+    assert db.session.query(IdempotencyKey).count() == 0
+
+
+def test_expired_idempotency_keys(app, create_user):
+    user = create_user()
+    run_idempotent(user.id, "old", hash_request(b""), lambda: ({"n": 1}, 201))
+    run_idempotent(user.id, "new", hash_request(b""), lambda: ({"n": 2}, 201))
+    db.session.execute(
+        update(IdempotencyKey).where(IdempotencyKey.key == "old")
+        .values(created_at=datetime.now(timezone.utc) - timedelta(days=2)))
+    db.session.commit()
+
+    assert run_idempotent(user.id, "old", hash_request(b""), lambda: ({"n": 3}, 201)) == ({"n": 3}, 201)
+
+    db.session.execute(
+        update(IdempotencyKey).values(created_at=datetime.now(timezone.utc) - timedelta(days=2)))
+    db.session.commit()
+    assert purge_expired_idempotency_keys() == 2
+
+
+def test_abandoned_idempotency_claim_is_reclaimed(app, create_user):
+    user = create_user()
+    # A claim committed by a request whose worker died before storing the response
+    db.session.add(IdempotencyKey(user_id=user.id, key="checkout-1", request_hash=hash_request(b"")))
+    db.session.commit()
+
+    with pytest.raises(IdempotencyKeyInProgressError):
+        run_idempotent(user.id, "checkout-1", hash_request(b""), lambda: ({"n": 1}, 201))
+
+    db.session.execute(
+        update(IdempotencyKey).values(created_at=datetime.now(timezone.utc) - timedelta(minutes=2)))
+    db.session.commit()
+    assert run_idempotent(user.id, "checkout-1", hash_request(b""), lambda: ({"n": 2}, 201)) == ({"n": 2}, 201)
+    assert run_idempotent(user.id, "checkout-1", hash_request(b""), lambda: ({"n": 3}, 201)) == ({"n": 2}, 201)
+
+
+def test_idempotency_settings_from_environment(database_uri, monkeypatch):
+    monkeypatch.setenv("IDEMPOTENCY_KEY_TTL", "3600")
+    monkeypatch.setenv("IDEMPOTENCY_CLAIM_TIMEOUT", "120")
+
+    flask_app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": database_uri})
+
+    assert flask_app.config["IDEMPOTENCY_KEY_TTL"] == 3600
+    assert flask_app.config["IDEMPOTENCY_CLAIM_TIMEOUT"] == 120
+
+
+@pytest.mark.parametrize("order_by, order_direction", [
+    ("order_date", "desc"),
+    ("order_date", "asc"),
+    ("total_amount", "desc"),
+    ("status", "asc"),
+])
+def test_get_user_orders_keyset_pagination(app, create_user, create_address, create_order,
+                                           order_by, order_direction):
+    user = create_user()
+    address = create_address(user_id=user.id)
+    placed_at = datetime(2025, 1, 1)
+    for i in range(7):
+        order = create_order(user=user, address=address, total_amount=(i % 3) * 10,
+                             status=list(OrderStatus)[i % 3])
+        # Pairs of orders share a timestamp, so the id tie-breaker matters
+        order.order_date = placed_at + timedelta(days=i // 2)
+    db.session.commit()
+
+    expected = get_user_orders(user.id, order_by=order_by, order_direction=order_direction)
+    pages, cursor = [], None
+    while True:
+        page = get_user_orders(user.id, order_by=order_by, order_direction=order_direction,
+                               limit=3, cursor=cursor)
+        pages.extend(page)
+        cursor = get_orders_next_cursor(page, order_by, order_direction, limit=3)
+        if cursor is None:
+            break
+
+    assert [o["order_id"] for o in pages] == [o["order_id"] for o in expected]
+    assert len(pages) == 7
+
+    with pytest.raises(ApplicationError, match="Cursor does not match"):
+        other_direction = "asc" if order_direction == "desc" else "desc"
+        first_page = get_user_orders(user.id, order_by=order_by, order_direction=order_direction, limit=3)
+        get_user_orders(user.id, order_by=order_by, order_direction=other_direction,
+                        cursor=get_orders_next_cursor(first_page, order_by, order_direction, 3))
+
+
+def test_get_user_orders_summary(app, create_user, create_address, create_order, create_order_item,
+                                 assert_max_queries):
+    user = create_user()
+    address = create_address(user_id=user.id)
+    order = create_order(user=user, address=address, total_amount=30)
+    create_order_item(order=order, quantity=2)
+    create_order_item(order=order, quantity=1)
+    empty_order = create_order(user=user, address=address)
+    user_id = user.id
+    db.session.expire_all()
+
+    with assert_max_queries(1) as tracker:
+        summaries = get_user_orders(user_id, summary=True)
+
+    statement = next(iter(tracker.statements))
+    assert "order_items" in statement and "products" not in statement
+    assert {s["order_id"]: s["item_count"] for s in summaries} == {
+        str(order.id): 3, str(empty_order.id): 0}
+    assert all("items" not in s for s in summaries)
+
+    items = get_order_items(user.id, order.id)
+    assert sorted(item["quantity"] for item in items) == [1, 2]
+    with pytest.raises(ApplicationError, match="not found"):
+        get_order_items(create_user().id, order.id)
+
+
+def test_get_user_orders_sparse_fields(app, create_user, create_address, create_order, create_order_item,
+                                       assert_max_queries):
+    user = create_user()
+    address = create_address(user_id=user.id)
+    order = create_order(user=user, address=address, total_amount=30)
+    create_order_item(order=order, quantity=2)
+    user_id = user.id
+    db.session.expire_all()
+
+    with assert_max_queries(1) as tracker:
+        orders = get_user_orders(user_id, fields=("order_id", "status"))
+
+    statement = next(iter(tracker.statements))
+    assert "order_items" not in statement and "total_amount" not in statement
+    assert orders == [{"order_id": str(order.id), "status": "Pending", "order_date": order.order_date.isoformat()}]
+
+    with assert_max_queries(1):
+        summaries = get_user_orders(user_id, summary=True, fields=("order_id", "item_count"))
+    assert [set(s) for s in summaries] == [{"order_id", "order_date", "item_count"}]
+    assert summaries[0]["item_count"] == 2
+
+    full = get_user_orders(user_id, order_by="total_amount", fields=("order_id", "items"))
+    assert set(full[0]) == {"order_id", "total_amount", "items"}
+    assert full[0]["items"][0]["quantity"] == 2
+
+
+def test_user_orders_route_sparse_fields(client, create_user, create_address, create_order, monkeypatch):
+    user = create_user()
+    address = create_address(user_id=user.id)
+    for day in range(3):
+        create_order(user=user, address=address).order_date = datetime(2025, 1, 1) + timedelta(days=day)
+    db.session.commit()
+    user_id = user.id
+    # Authenticate through the verified token cache instead of Cognito
+    monkeypatch.setattr(auth_services, "token_cache", VerifiedTokenCache())
+    auth_services.token_cache.set("test-token", {"sub": user_id, "exp": time.time() + 3600})
+    headers = {"Authorization": "Bearer test-token"}
+
+    response = client.get(f"/orders/{user_id}?fields=status&limit=2", headers=headers)
+    assert response.status_code == 200
+    first_page = response.json
+    assert [set(order) for order in first_page["orders"]] == [{"order_id", "order_date", "status"}] * 2
+
+    response = client.get(
+        f"/orders/{user_id}?fields=status&limit=2&cursor={first_page['next_cursor']}", headers=headers)
+    assert len(response.json["orders"]) == 1
+    assert response.json["next_cursor"] is None
+    assert response.json["orders"][0]["order_date"] < first_page["orders"][-1]["order_date"]
+
+    response = client.get(f"/orders/{user_id}?fields=status,secret", headers=headers)
+    assert response.status_code == 400
+    assert response.json == {"error": "Unknown fields: secret."}
+    assert client.get(f"/orders/{user_id}?fields=item_count", headers=headers).status_code == 400
+    assert client.get(f"/orders/{user_id}?view=summary&fields=items", headers=headers).status_code == 400
+    assert client.get(f"/orders/{user_id}?view=summary&fields=item_count", headers=headers).status_code == 200
+
+
+def test_order_service_query_budgets(app, filled_cart, create_products, create_address, assert_max_queries):
+    products = create_products(10, stock=10)
+    cart = filled_cart(products, quantity=2)
+    address = create_address(user_id=cart.user_id)
+    user_id, address_id = cart.user_id, address.id
+    db.session.expire_all()
+
+    with assert_max_queries(7):
+        order = place_order(user_id, address_id)
+    order_id = order.id
+
+    with assert_max_queries(2):
+        get_user_orders(user_id)
+
+    db.session.expire_all()
+    with assert_max_queries(2):
+        change_order_status(order_id, "COMPLETED")
+
+    with pytest.raises(StatusError):
+        change_order_status(order_id, "CANCELED")
+
+
+def test_cancelling_pending_order_restocks_products(app, filled_cart, create_products, create_address):
+    products = create_products(3, stock=10)
+    cart = filled_cart(products, quantity=2)
+    address = create_address(user_id=cart.user_id)
+    order = place_order(cart.user_id, address.id)
+    assert all(db.session.get(Product, p.id).stock == 8 for p in products)
+
+    assert change_order_status(order.id, "CANCELED").status == OrderStatus.CANCELED
+    assert all(db.session.get(Product, p.id).stock == 10 for p in products)
+
+    with pytest.raises(StatusError):
+        change_order_status(order.id, "CANCELED")
+    assert all(db.session.get(Product, p.id).stock == 10 for p in products)
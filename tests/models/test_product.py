@@ -1,9 +1,16 @@
 import pytest
+from flask import jsonify
 from app.models.product import Product
 from app.models.cart_item import CartItem
 from app.models.product_category import ProductCategory
 from app.models.category import Category
 from app.db import db
+from app.services.product_service import (
+    get_all_products,
+    get_products_next_cursor,
+    get_products_page,
+    get_product_by_id,
+)
 
 
 def test_product_cascade_deletion_for_cart_items(app, create_product, create_cart):
@@ -140,4 +147,166 @@ def test_product_to_dict_method(app, create_product):
     assert product_dict["name"] == "Test Product"
     assert product_dict["price"] == 25.0
     assert product_dict["description"] == "A product for testing"
-    assert product_dict["stock"] == 10
\ No newline at end of file
+    assert product_dict["stock"] == 10
+
+@pytest.mark.parametrize("order_by", [None, "a-z", "z-a", "high", "low"])
+def test_get_all_products_keyset_pagination(app, create_product, order_by):
+    """Paging through products with a cursor returns every product exactly once, in order."""
+    for index, price in enumerate([5.0, 5.0, 12.5, 3.0, 8.0, 12.5, 1.0]):
+        create_product(f"Product {index}", price)
+
+    expected = get_all_products(order_by=order_by)
+    pages, cursor = [], None
+    while True:
+        page = get_all_products(order_by=order_by, limit=3, cursor=cursor)
+        pages.extend(page)
+        cursor = get_products_next_cursor(page, order_by, 3)
+        if cursor is None:
+            break
+
+    assert [product["id"] for product in pages] == [product["id"] for product in expected]
+    assert len(pages) == 7
+
+
+def test_get_all_products_full_text_search(app, create_product):
+    """Search matches word prefixes in the name or description and ranks the results."""
+    create_product("Tatami Mat", 50.0, "Traditional tatami of rice straw")
+    create_product("Futon", 80.0, "Cotton futon that fits on a tatami floor")
+    create_product("Tea Set", 30.0, "Cast iron teapot")
+
+    results = get_all_products(search="tatam")
+
+    assert [product["name"] for product in results] == ["Tatami Mat", "Futon"]
+    assert all("rank" not in product for product in results)
+    assert get_all_products(search="nothing matches this") == []
+
+
+def test_get_products_page_relevance_pagination(app, client, create_product):
+    """Relevance-ordered pages chain through the cursor without exposing the rank."""
+    for index in range(5):
+        create_product(f"Tatami {index}", 50.0, "tatami " * index)
+
+    expected = get_all_products(search="tatami")
+    pages, cursor = [], None
+    while True:
+        page, cursor = get_products_page(search="tatami", limit=2, cursor=cursor)
+        pages.extend(page)
+        if cursor is None:
+            break
+
+    assert [product["id"] for product in pages] == [product["id"] for product in expected]
+    assert len(pages) == 5
+    response = client.get("/products/?search=tatami&limit=2")
+    assert response.json["next_cursor"] is not None
+    assert all("rank" not in product for product in response.json["products"])
+
+
+def test_get_all_products_stopword_search(app, create_product):
+    """A search made only of stopwords falls back to a substring match instead of matching nothing."""
+    create_product("The Tatami Mat", 50.0)
+    create_product("Futon", 80.0, "Folds away in the morning")
+    create_product("Tea Set", 30.0, "Cast iron teapot")
+
+    assert {product["name"] for product in get_all_products(search="the")} == {"The Tatami Mat", "Futon"}
+    assert [product["name"] for product in get_all_products(search="the tatami")] == ["The Tatami Mat"]
+
+
+def test_get_all_products_search_without_words(app, create_product):
+    """A term without any word is matched as a substring instead of returning the whole catalog."""
+    create_product("Tatami Mat", 50.0, "Rice straw, 100% natural")
+    create_product("Futon", 80.0, "Cotton")
+
+    assert [product["name"] for product in get_all_products(search="100%")] == ["Tatami Mat"]
+    assert [product["name"] for product in get_all_products(search="%")] == ["Tatami Mat"]
+    assert get_all_products(search="!!!") == []
+    assert len(get_all_products(search="  ")) == 2
+
+
+def test_get_all_products_category_filter(app, create_product):
+    """Filtering by category returns only products assigned to it, with all their categories."""
+    mats, bedding = Category(name="Mats"), Category(name="Bedding")
+    db.session.add_all([mats, bedding])
+    db.session.commit()
+    tatami = create_product("Tatami Mat", 50.0)
+    futon = create_product("Futon", 80.0)
+    create_product("Tea Set", 30.0)
+    db.session.add_all([
+        ProductCategory(product_id=tatami.id, category_id=mats.id),
+        ProductCategory(product_id=futon.id, category_id=mats.id),
+        ProductCategory(product_id=futon.id, category_id=bedding.id),
+    ])
+    db.session.commit()
+
+    results = get_all_products(category="Bedding")
+
+    assert [product["name"] for product in results] == ["Futon"]
+    assert sorted(results[0]["categories"]) == ["Bedding", "Mats"]
+    assert len(get_all_products(category="Mats")) == 2
+    assert get_all_products(category="Unknown") == []
+    assert len(get_all_products(category="all")) == 3
+
+
+def test_get_all_products_sparse_fields(app, create_product, assert_max_queries):
+    """Sparse fieldsets trim the selected columns, and keep the ID and sort key for the cursor."""
+    create_product("Tatami Mat", 50.0, "Traditional rice straw mat")
+    create_product("Futon", 80.0, "Cotton futon")
+    db.session.expire_all()
+
+    with assert_max_queries(1) as tracker:
+        products = get_all_products(order_by="low", fields=("name",))
+
+    statement = next(iter(tracker.statements))
+    assert "description" not in statement and "product_categories" not in statement
+    assert [set(product) for product in products] == [{"id", "name", "price"}] * 2
+    assert [product["name"] for product in products] == ["Tatami Mat", "Futon"]
+
+    page = get_all_products(order_by="low", limit=1, fields=("name",))
+    cursor = get_products_next_cursor(page, "low", 1)
+    assert get_all_products(order_by="low", limit=1, cursor=cursor, fields=("name",))[0]["name"] == "Futon"
+
+
+def test_product_routes_sparse_fields(client, create_product):
+    product = create_product("Tatami Mat", 50.0, "Traditional rice straw mat")
+
+    response = client.get("/products/?fields=name, image_url,categories")
+    assert response.json == [{"id": str(product.id), "name": "Tatami Mat", "image_url": None, "categories": []}]
+
+    response = client.get(f"/products/{product.id}?fields=price")
+    assert response.json == {"id": str(product.id), "price": 50.0}
+
+    response = client.get("/products/?fields=name,secret")
+    assert response.status_code == 400
+    assert response.json == {"error": "Unknown fields: secret."}
+    assert client.get(f"/products/{product.id}?fields=secret").status_code == 400
+
+
+def test_product_route_encodes_to_dict(app, client, create_product):
+    """GET /products/<id> returns the same bytes as `jsonify(product.to_dict())`; `price` stays a number."""
+    product = create_product("Tatami Mat", 12.5, "Traditional rice straw mat", 3)
+    with app.test_request_context():
+        expected = jsonify(product.to_dict()).get_data()
+
+    response = client.get(f"/products/{product.id}")
+
+    assert response.data == expected
+    assert response.json["price"] == 12.5
+
+
+def test_product_service_query_budgets(app, create_products, assert_max_queries):
+    category = Category(name="Teaware")
+    db.session.add(category)
+    products = create_products(10, stock=3)
+    for product in products:
+        db.session.add(ProductCategory(product_id=product.id, category_id=category.id))
+    db.session.commit()
+    product_id = products[0].id
+    db.session.expire_all()
+
+    with assert_max_queries(1):
+        assert len(get_all_products(None, None, "a-z", None)) == 10
+    with assert_max_queries(1):
+        get_all_products("test", None, None, None, limit=5)
+    with assert_max_queries(2):
+        assert len(get_all_products(None, "Teaware", None, None)) == 10
+    with assert_max_queries(1):
+        get_product_by_id(product_id)
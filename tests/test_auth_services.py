@@ -0,0 +1,141 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from flask import Flask, request
+
+from app.services import auth_services
+from app.services.auth_services import JWKSKeyStore, VerifiedTokenCache, token_required
+
+JWKS_URL = "https://cognito.example.com/.well-known/jwks.json"
+
+
+def jwks_response(*kids):
+    response = MagicMock()
+    response.json.return_value = {"keys": [{"kid": kid, "kty": "RSA"} for kid in kids]}
+    return response
+
+
+@pytest.fixture
+def jwks_get():
+    with patch("app.services.auth_services.requests.get") as get:
+        yield get
+
+
+def test_jwks_fetched_on_first_lookup(jwks_get):
+    jwks_get.return_value = jwks_response("key-1")
+
+    store = JWKSKeyStore(JWKS_URL)
+    assert jwks_get.call_count == 0
+
+    assert store.get_key("key-1") == {"kid": "key-1", "kty": "RSA"}
+    assert store.get_key("key-1") is not None
+    jwks_get.assert_called_once_with(JWKS_URL, timeout=5)
+
+
+def test_jwks_unknown_kid_refetch_is_rate_limited(jwks_get, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(auth_services.time, "monotonic", lambda: now[0])
+    jwks_get.return_value = jwks_response("key-1")
+    store = JWKSKeyStore(JWKS_URL, min_refetch_interval=60)
+
+    # The first fetch counts as a refetch: a forged kid right after boot fetches nothing more
+    assert store.get_key("forged") is None
+    assert jwks_get.call_count == 1
+
+    now[0] += 60
+    jwks_get.return_value = jwks_response("key-1", "key-2")
+    assert store.get_key("key-2") is not None
+    assert jwks_get.call_count == 2
+
+    assert store.get_key("forged") is None
+    assert jwks_get.call_count == 2
+
+
+def test_jwks_stale_set_refreshes_in_background(jwks_get):
+    jwks_get.return_value = jwks_response("key-1")
+    store = JWKSKeyStore(JWKS_URL, ttl=0)
+    store.get_key("key-1")
+
+    release = threading.Event()
+
+    def slow_fetch(url, timeout):
+        release.wait(5)
+        return jwks_response("key-2")
+
+    jwks_get.side_effect = slow_fetch
+    # The old keys are served while the refresh is in flight
+    assert store.get_key("key-1") == {"kid": "key-1", "kty": "RSA"}
+    assert store.get_key("key-1") is not None
+    release.set()
+    store._refresh_thread.join(5)
+
+    assert jwks_get.call_count == 2
+    assert store._keys.keys() == {"key-2"}
+
+
+def test_jwks_failed_refresh_keeps_old_keys(jwks_get):
+    jwks_get.return_value = jwks_response("key-1")
+    store = JWKSKeyStore(JWKS_URL, ttl=0, min_refetch_interval=60)
+    store.get_key("key-1")
+
+    jwks_get.side_effect = requests.ConnectionError("JWKS endpoint down")
+    assert store.get_key("key-1") is not None
+    store._refresh_thread.join(5)
+
+    # The failure is backed off: the next stale lookups start no new refresh
+    assert store.get_key("key-1") == {"kid": "key-1", "kty": "RSA"}
+    assert store.get_key("key-1") is not None
+    assert jwks_get.call_count == 2
+
+
+@pytest.fixture
+def protected_client(monkeypatch):
+    """A client for an app with one `token_required` route, with token verification mocked."""
+    monkeypatch.setenv("AWS_COGNITO_CLIENT_ID", "client-id")
+    monkeypatch.setattr(auth_services, "token_cache", VerifiedTokenCache())
+    monkeypatch.setattr(auth_services.jwks_store, "get_key", lambda kid: {"kid": kid})
+    monkeypatch.setattr(auth_services.jwt, "get_unverified_header", lambda token: {"kid": "key-1"})
+    flask_app = Flask(__name__)
+    flask_app.add_url_rule("/protected", "protected", token_required(lambda: request.user["sub"]))
+    return flask_app.test_client()
+
+
+def test_token_cache_hit_skips_verification(protected_client):
+    payload = {"sub": "user-1", "exp": time.time() + 3600}
+    headers = {"Authorization": "Bearer token-1"}
+
+    with patch.object(auth_services.jwt, "decode", return_value=payload) as decode:
+        assert protected_client.get("/protected", headers=headers).data == b"user-1"
+        assert protected_client.get("/protected", headers=headers).data == b"user-1"
+
+    assert decode.call_count == 1
+    assert auth_services.token_cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_token_cache_expired_entry_is_a_miss():
+    cache = VerifiedTokenCache()
+    cache.set("expired", {"sub": "user-1", "exp": time.time() - 1})
+    valid = {"sub": "user-2", "exp": time.time() + 3600}
+    cache.set("valid", valid)
+
+    assert cache.get("expired") is None
+    assert cache.get("valid") == valid
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_token_cache_evicts_least_recently_used():
+    cache = VerifiedTokenCache(max_size=2)
+    exp = time.time() + 3600
+    cache.set("a", {"sub": "a", "exp": exp})
+    cache.set("b", {"sub": "b", "exp": exp})
+    assert cache.get("a") is not None
+
+    cache.set("c", {"sub": "c", "exp": exp})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats() == {"hits": 3, "misses": 1, "size": 2}
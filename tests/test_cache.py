@@ -0,0 +1,110 @@
+from app import create_app
+from app.cache import CatalogCache, catalog_cache
+from app.invalidation import invalidation_bus
+from app.services.cart_service import add_item_to_cart
+from app.services.category_service import create_category
+from app.services.product_service import update_product
+
+
+def test_catalog_cache_lru_eviction():
+    """The least recently used response is evicted once the cache is full."""
+    cache = CatalogCache(max_size=2)
+    cache.set("a", b"A", cache.generation)
+    cache.set("b", b"B", cache.generation)
+    assert cache.get("a") == b"A"
+
+    cache.set("c", b"C", cache.generation)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"A"
+    assert cache.get("c") == b"C"
+
+
+def test_catalog_cache_invalidate_discards_stale_responses():
+    """Invalidation drops cached responses and rejects bodies read before it."""
+    cache = CatalogCache()
+    generation = cache.generation
+    cache.set("a", b"A", generation)
+
+    cache.invalidate()
+    cache.set("b", b"B", generation)
+
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+
+
+def test_catalog_cache_evict_drops_tagged_responses_only():
+    """Evicting entity keys drops the responses tagged with them and keeps the rest."""
+    cache = CatalogCache()
+    cache.set("listing", b"L", cache.generation, tags=("products",))
+    cache.set("product-1", b"P1", cache.generation, tags=("product:1",))
+    cache.set("product-2", b"P2", cache.generation, tags=("product:2",))
+
+    cache.evict({"products", "product:1"})
+
+    assert cache.get("listing") is None
+    assert cache.get("product-1") is None
+    assert cache.get("product-2") == b"P2"
+
+
+def test_product_etag_conditional_get(client, create_product):
+    """A matching If-None-Match gets an empty 304; a write changes the ETag."""
+    product = create_product(stock=5)
+
+    response = client.get(f"/products/{product.id}")
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+    assert "max-age" in response.headers["Cache-Control"]
+
+    response = client.get(f"/products/{product.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+    update_product(product.id, {"stock": 4})
+
+    response = client.get(f"/products/{product.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json["stock"] == 4
+
+
+def test_categories_etag_conditional_get(client):
+    """The category listing is revalidated with its ETag."""
+    response = client.get("/categories/")
+    etag = response.headers["ETag"]
+
+    response = client.get("/categories/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    create_category({"name": "Teaware"})
+
+    response = client.get("/categories/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [category["name"] for category in response.json] == ["Teaware"]
+
+
+def test_stock_changes_evict_only_listings_with_the_product(client, create_product, create_cart):
+    """Adding to the cart evicts the listings showing the product and keeps the others."""
+    tatami_id = create_product("Tatami Mat", 50.0, stock=5).id
+    create_product("Futon", 80.0, stock=5)
+    user_id = create_cart().user_id
+    client.get("/products/?search=tatami")
+    client.get("/products/?search=futon")
+    assert len(catalog_cache._entries) == 2
+
+    add_item_to_cart(user_id, tatami_id, 1)
+
+    assert [key[1] for key in catalog_cache._entries] == ["futon"]
+    assert client.get("/products/?search=tatami").json[0]["stock"] == 4
+
+
+def test_cache_settings_from_environment(database_uri, monkeypatch):
+    monkeypatch.setenv("CATALOG_CACHE_SIZE", "64")
+    monkeypatch.setenv("CATALOG_CACHE_MAX_AGE", "30")
+    monkeypatch.setenv("CACHE_INVALIDATION_CHANNEL", "catalog_staging")
+
+    flask_app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": database_uri})
+
+    assert flask_app.config["CATALOG_CACHE_MAX_AGE"] == 30
+    assert catalog_cache.max_size == 64
+    assert invalidation_bus.channel == "catalog_staging"
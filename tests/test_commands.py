@@ -0,0 +1,64 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, MetaData, Table, UniqueConstraint, text
+
+from app.commands import find_unindexed_foreign_keys
+from app.db import db
+
+
+def test_find_unindexed_foreign_keys():
+    metadata = MetaData()
+    Table("parents", metadata, Column("id", Integer, primary_key=True))
+    Table(
+        "children", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("indexed_id", ForeignKey("parents.id"), index=True),
+        Column("prefix_id", ForeignKey("parents.id")),
+        Column("trailing_id", ForeignKey("parents.id")),
+        Column("expression_id", ForeignKey("parents.id")),
+        Column("unique_id", ForeignKey("parents.id")),
+        Index("ix_children_prefix_id_id", "prefix_id", "id"),
+        Index("ix_children_id_trailing_id", "id", "trailing_id"),
+        Index("ix_children_expression", text("expression_id DESC")),
+        UniqueConstraint("unique_id", "id"),
+    )
+
+    assert find_unindexed_foreign_keys(metadata) == [
+        ("children", ["expression_id"]),
+        ("children", ["trailing_id"]),
+    ]
+
+
+def test_every_model_foreign_key_is_indexed(app):
+    assert find_unindexed_foreign_keys(db.metadata) == []
+
+
+def test_seed_command(app):
+    """`flask seed` bulk-loads a consistent dataset and refuses to seed a non-empty database."""
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["seed", "--products", "200", "--categories", "10", "--users", "50",
+                                 "--orders", "500"])
+    assert result.exit_code == 0, result.output
+
+    assert db.session.scalar(text("SELECT count(*) FROM products")) == 200
+    assert db.session.scalar(text("SELECT count(*) FROM carts")) == 50
+    assert db.session.scalar(text("SELECT count(*) FROM orders")) == 500
+    assert db.session.scalar(text(
+        "SELECT count(*) FROM orders o WHERE total_amount <> "
+        "(SELECT round(sum(quantity * price)::numeric, 2) FROM order_items WHERE order_id = o.id)")) == 0
+    # Zipf popularity: the best seller fills far more order lines than the median product
+    line_counts = db.session.scalars(text(
+        "SELECT count(order_items.product_id) FROM products "
+        "LEFT JOIN order_items ON order_items.product_id = products.id "
+        "GROUP BY products.id ORDER BY 1 DESC")).all()
+    assert line_counts[0] > 10 * line_counts[len(line_counts) // 2]
+
+    result = runner.invoke(args=["seed", "--products", "10"])
+    assert result.exit_code != 0
+    assert "not empty" in result.output
+
+    result = runner.invoke(args=["seed", "--truncate", "--categories", "0"])
+    assert result.exit_code == 2
+    assert "Invalid value for '--categories'" in result.output
+
+    result = runner.invoke(args=["seed", "--truncate", "--products", "10", "--users", "5", "--orders", "5"])
+    assert result.exit_code == 0, result.output
+    assert db.session.scalar(text("SELECT count(*) FROM products")) == 10
@@ -0,0 +1,84 @@
+import gzip
+import json
+
+from flask import jsonify
+
+from app import create_app
+from app.cache import catalog_cache
+
+GZIP = {"Accept-Encoding": "gzip, deflate"}
+
+
+def test_large_responses_are_compressed(app, client):
+    payload = [{"description": "Hand woven from rush grass. " * 4, "quantity": n} for n in range(20)]
+    app.add_url_rule("/large", "large", lambda: jsonify(payload))
+
+    response = client.get("/large", headers=GZIP)
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.vary
+    assert int(response.headers["Content-Length"]) == len(response.data)
+    assert json.loads(gzip.decompress(response.data)) == payload
+
+    response = client.get("/large")
+    assert "Content-Encoding" not in response.headers
+    assert response.json == payload
+
+
+def test_small_responses_are_not_compressed(app, client):
+    app.add_url_rule("/small", "small", lambda: jsonify({"quantity": 1}))
+    app.config["COMPRESSION_MIN_SIZE"] = 1024
+
+    response = client.get("/small", headers=GZIP)
+
+    assert "Content-Encoding" not in response.headers
+    assert response.json == {"quantity": 1}
+
+
+def test_compression_level(app, client):
+    payload = {"description": "Tatami " * 500}
+    app.add_url_rule("/large", "large", lambda: jsonify(payload))
+
+    app.config["COMPRESSION_GZIP_LEVEL"] = 1
+    fast = client.get("/large", headers=GZIP).data
+    app.config["COMPRESSION_GZIP_LEVEL"] = 9
+    small = client.get("/large", headers=GZIP).data
+
+    assert len(small) <= len(fast)
+    assert gzip.decompress(small) == gzip.decompress(fast)
+
+
+def test_cached_catalog_responses_are_stored_compressed(client, create_products):
+    create_products(20, description="Hand woven from rush grass.")
+
+    response = client.get("/products/", headers=GZIP)
+    etag = response.headers["ETag"]
+    products = json.loads(gzip.decompress(response.data))
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert etag.endswith('-gzip"')
+    assert len(products) == 20
+    [(cached, _)] = catalog_cache._entries.values()
+    assert cached.compressed == {"gzip": response.data}
+
+    identity = client.get("/products/")
+    assert "Content-Encoding" not in identity.headers
+    assert identity.json == products
+    assert identity.headers["ETag"] != etag
+
+    revalidated = client.get("/products/", headers={**GZIP, "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert "Accept-Encoding" in revalidated.vary
+
+
+def test_compression_settings_from_environment(database_uri, monkeypatch):
+    monkeypatch.setenv("COMPRESSION_ENABLED", "false")
+    monkeypatch.setenv("COMPRESSION_MIN_SIZE", "2048")
+    monkeypatch.setenv("COMPRESSION_GZIP_LEVEL", "9")
+
+    flask_app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": database_uri})
+
+    assert flask_app.config["COMPRESSION_ENABLED"] is False
+    assert flask_app.config["COMPRESSION_MIN_SIZE"] == 2048
+    assert flask_app.config["COMPRESSION_GZIP_LEVEL"] == 9
+    assert flask_app.config["COMPRESSION_BROTLI_LEVEL"] == 4
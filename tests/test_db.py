@@ -0,0 +1,49 @@
+from app import create_app
+from app.db import engine_options_from_env
+
+
+def test_engine_options_defaults():
+    options = engine_options_from_env("postgresql://localhost/tatami", {})
+
+    assert options == {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30.0,
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+    }
+
+
+def test_engine_options_from_environment():
+    options = engine_options_from_env("postgresql://localhost/tatami", {
+        "DB_POOL_SIZE": "20",
+        "DB_MAX_OVERFLOW": "0",
+        "DB_POOL_TIMEOUT": "2.5",
+        "DB_POOL_PRE_PING": "false",
+        "DB_POOL_RECYCLE": "-1",
+    })
+
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == 0
+    assert options["pool_timeout"] == 2.5
+    assert options["pool_pre_ping"] is False
+    assert options["pool_recycle"] == -1
+
+
+def test_engine_options_pgbouncer_transaction_mode():
+    """Drivers that prepare statements on the server are told not to."""
+    environ = {"DB_PGBOUNCER_TRANSACTION_MODE": "true"}
+
+    psycopg = engine_options_from_env("postgresql+psycopg://pgbouncer/tatami", environ)
+    psycopg2 = engine_options_from_env("postgresql://pgbouncer/tatami", environ)
+
+    assert psycopg["connect_args"] == {"prepare_threshold": None}
+    assert "connect_args" not in psycopg2
+
+
+def test_read_your_writes_window_from_environment(database_uri, monkeypatch):
+    monkeypatch.setenv("READ_YOUR_WRITES_WINDOW", "12")
+
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": database_uri})
+
+    assert app.config["READ_YOUR_WRITES_WINDOW"] == 12
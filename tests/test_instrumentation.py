@@ -0,0 +1,67 @@
+import logging
+
+from sqlalchemy import select, text
+
+from app import create_app
+from app.db import db
+from app.instrumentation import track_queries
+from app.models.product import Product
+
+
+def test_track_queries_nests(app):
+    with track_queries() as outer:
+        with track_queries() as inner:
+            db.session.execute(text("SELECT 1"))
+        db.session.execute(text("SELECT 2"))
+
+    assert inner.count == 1
+    assert outer.count == 2
+    assert inner.repeated_statements(1) == [("SELECT 1", 1)]
+    assert sorted(outer.statements) == ["SELECT 1", "SELECT 2"]
+
+
+def test_server_timing_header(app, client, create_product):
+    create_product()
+    app.config["SERVER_TIMING"] = True
+
+    response = client.get("/products/")
+
+    timings = response.headers.getlist("Server-Timing")
+    assert timings[0].startswith("db;dur=")
+    assert 'desc="1 queries"' in timings[0]
+    assert timings[1].startswith("app;dur=")
+
+
+def test_server_timing_disabled_outside_debug(client):
+    assert "Server-Timing" not in client.get("/products/").headers
+
+
+def test_n_plus_one_warning(app, client, create_product, caplog):
+    product_ids = [create_product().id for _ in range(5)]
+
+    def n_plus_one():
+        for product_id in product_ids:
+            db.session.execute(select(Product).where(Product.id == product_id)).scalar_one()
+        return "", 204
+
+    app.add_url_rule("/n-plus-one", "n_plus_one", n_plus_one)
+
+    with caplog.at_level(logging.WARNING, logger="app.instrumentation"):
+        client.get("/n-plus-one")
+
+    assert "Possible N+1 query in n_plus_one: statement executed 5 times" in caplog.text
+
+
+def test_instrumentation_settings_from_environment(database_uri, monkeypatch):
+    monkeypatch.setenv("N_PLUS_ONE_THRESHOLD", "10")
+    monkeypatch.setenv("SERVER_TIMING", "true")
+
+    flask_app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": database_uri})
+
+    assert flask_app.config["N_PLUS_ONE_THRESHOLD"] == 10
+    assert flask_app.config["SERVER_TIMING"] is True
+
+    # Unset, Server-Timing follows debug mode
+    monkeypatch.delenv("SERVER_TIMING")
+    flask_app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": database_uri})
+    assert "SERVER_TIMING" not in flask_app.config
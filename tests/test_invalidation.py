@@ -0,0 +1,117 @@
+import threading
+import time
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func, select
+
+from app.db import db
+from app.invalidation import InvalidationBus
+
+# Postgres only delivers notifications when the outer transaction really commits
+pytestmark = pytest.mark.commits
+
+
+class RecordingCache:
+    """Subscriber that records the keys it is asked to evict."""
+
+    def __init__(self):
+        self.evicted = []
+        self.flushes = 0
+        self.received = threading.Event()
+
+    def evict(self, keys):
+        self.evicted.append(set(keys))
+        self.received.set()
+
+    def flush(self):
+        self.flushes += 1
+
+
+def wait_for_keys(cache, keys, timeout=5):
+    """Wait until the listener has delivered every key in `keys` to `cache`."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        # The first eviction is the publishing worker's own, right after the commit
+        if set().union(*cache.evicted[1:]) >= set(keys):
+            return True
+        cache.received.clear()
+        cache.received.wait(0.1)
+    return False
+
+
+@pytest.fixture
+def bus(app):
+    """An invalidation bus on a private channel with a running listener."""
+    bus = InvalidationBus(channel=f"test_invalidation_{uuid4().hex}")
+    bus.start_listener(app.config["SQLALCHEMY_DATABASE_URI"])
+    assert bus.listener.listening.wait(5)
+    yield bus
+    bus.stop_listener(timeout=10)
+
+
+def test_publish_evicts_locally_after_commit(app):
+    bus = InvalidationBus(channel=f"test_invalidation_{uuid4().hex}")
+    cache = RecordingCache()
+    bus.subscribe(cache.evict, cache.flush)
+
+    bus.publish(["products", "product:1"])
+    assert cache.evicted == []
+
+    db.session.commit()
+
+    assert cache.evicted == [{"products", "product:1"}]
+
+
+def test_listener_receives_committed_keys(bus):
+    cache = RecordingCache()
+    bus.subscribe(cache.evict, cache.flush)
+
+    bus.publish(["products", "product:1"])
+    db.session.commit()
+
+    assert wait_for_keys(cache, {"products", "product:1"})
+
+
+def test_rolled_back_keys_are_not_delivered(bus):
+    cache = RecordingCache()
+    bus.subscribe(cache.evict, cache.flush)
+
+    bus.publish(["product:rolled-back"])
+    db.session.rollback()
+    bus.publish(["product:committed"])
+    db.session.commit()
+
+    assert wait_for_keys(cache, {"product:committed"})
+    assert all("product:rolled-back" not in keys for keys in cache.evicted)
+
+
+def test_large_publish_is_split_into_several_notifications(bus):
+    cache = RecordingCache()
+    bus.subscribe(cache.evict, cache.flush)
+    keys = {f"product:{uuid4()}" for _ in range(500)}
+
+    bus.publish(keys)
+    db.session.commit()
+
+    assert wait_for_keys(cache, keys)
+
+
+def test_listener_flushes_and_reconnects_after_losing_its_connection(bus):
+    cache = RecordingCache()
+    bus.subscribe(cache.evict, cache.flush)
+    backend_pid = bus.listener.backend_pid
+
+    db.session.execute(select(func.pg_terminate_backend(backend_pid)))
+    db.session.commit()
+
+    deadline = time.monotonic() + 10
+    while bus.listener.backend_pid == backend_pid and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert bus.listener.listening.wait(5)
+    assert cache.flushes >= 1
+
+    bus.publish(["product:after-reconnect"])
+    db.session.commit()
+
+    assert wait_for_keys(cache, {"product:after-reconnect"})
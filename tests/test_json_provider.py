@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app import create_app, json_provider
+from app.json_provider import OrjsonProvider
+
+pytest.importorskip("orjson")
+
+
+@dataclass
+class Money:
+    amount: Decimal
+    currency: str
+
+
+@pytest.fixture
+def flask_app():
+    return Flask(__name__)
+
+
+def payload():
+    return {
+        "id": uuid4(),
+        "total_amount": Decimal("12.50"),
+        "order_date": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "delivery_date": date(2025, 1, 9),
+        "refund": Money(Decimal("1.10"), "USD"),
+        "items": [{"quantity": 2, "price": 19.99, "product_name": "Tatami mat"}],
+        "zebra": None,
+        "active": True,
+    }
+
+
+@pytest.mark.parametrize("debug", [False, True])
+def test_orjson_response_matches_default_provider(flask_app, debug):
+    flask_app.debug = debug
+    data = payload()
+
+    expected = DefaultJSONProvider(flask_app).response(data).get_data()
+    response = OrjsonProvider(flask_app).response(data)
+
+    assert response.get_data() == expected
+    assert response.mimetype == "application/json"
+
+
+def test_orjson_falls_back_to_stdlib(flask_app):
+    provider = OrjsonProvider(flask_app)
+
+    assert provider.dumps({1: 2 ** 70}) == '{"1": 1180591620717411303424}'
+    assert provider.dumps({"b": 1, "a": [1, 2]}, indent=4) == '{\n    "a": [\n        1,\n        2\n    ],\n    "b": 1\n}'
+    assert provider.dumps("café") == '"café"'
+    with pytest.raises(TypeError):
+        provider.dumps({"value": object()})
+
+
+def test_orjson_loads(flask_app):
+    provider = OrjsonProvider(flask_app)
+
+    assert provider.loads(b'{"quantity": 2, "name": "caf\\u00e9"}') == {"quantity": 2, "name": "café"}
+    assert provider.loads("NaN") != provider.loads("NaN")
+    with pytest.raises(ValueError):
+        provider.loads("{")
+
+
+def test_init_app(flask_app, monkeypatch):
+    json_provider.init_app(flask_app)
+    assert isinstance(flask_app.json, OrjsonProvider)
+
+    disabled = Flask(__name__)
+    disabled.config["ORJSON_ENABLED"] = False
+    json_provider.init_app(disabled)
+    assert not isinstance(disabled.json, OrjsonProvider)
+
+    monkeypatch.setattr(json_provider, "orjson", None)
+    missing = Flask(__name__)
+    json_provider.init_app(missing)
+    assert not isinstance(missing.json, OrjsonProvider)
+
+
+def test_orjson_disabled_from_environment(database_uri, monkeypatch):
+    monkeypatch.setenv("ORJSON_ENABLED", "false")
+
+    flask_app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": database_uri})
+
+    assert not isinstance(flask_app.json, OrjsonProvider)
@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app import create_app
+from app.db import db
+from app.metrics import InstrumentedQueuePool
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_request_metrics(client, create_product):
+    create_product()
+    labels = {"method": "GET", "endpoint": "product_bp.retrieve_all_products"}
+    requests_before = sample("http_requests_total", status="200", **labels)
+    latency_before = sample("http_request_duration_seconds_count", **labels)
+    queries_before = sample("http_request_db_queries_sum", endpoint=labels["endpoint"])
+
+    client.get("/products/")
+    client.get("/does-not-exist")
+
+    assert sample("http_requests_total", status="200", **labels) == requests_before + 1
+    assert sample("http_request_duration_seconds_count", **labels) == latency_before + 1
+    assert sample("http_request_db_queries_sum", endpoint=labels["endpoint"]) == queries_before + 1
+    assert sample("http_requests_in_progress", **labels) == 0
+    assert sample("http_requests_total", method="GET", endpoint="unmatched", status="404") >= 1
+
+
+def test_metrics_endpoint(client):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert b"# TYPE http_request_duration_seconds histogram" in response.data
+    assert b"db_pool_checked_out" in response.data
+
+
+def test_metrics_are_aggregated_across_processes(tmp_path):
+    """Each worker process writes its own samples; a scrape sums them."""
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    worker = (
+        "from app.metrics import REQUESTS;"
+        "REQUESTS.labels('GET', 'product_bp.retrieve_product', '200').inc()"
+    )
+    scrape = (
+        "from prometheus_client import CollectorRegistry, multiprocess;"
+        "registry = CollectorRegistry();"
+        "multiprocess.MultiProcessCollector(registry);"
+        "print(registry.get_sample_value('http_requests_total', "
+        "{'method': 'GET', 'endpoint': 'product_bp.retrieve_product', 'status': '200'}))"
+    )
+    for _ in range(3):
+        subprocess.run([sys.executable, "-c", worker], env=env, check=True)
+    result = subprocess.run([sys.executable, "-c", scrape], env=env, check=True,
+                            capture_output=True, text=True)
+
+    assert result.stdout.strip() == "3.0"
+
+
+def test_pool_checkout_wait_and_timeouts(app):
+    """Checkouts are timed; a checkout from an exhausted pool counts as a timeout."""
+    pool = db.engine.pool
+    assert isinstance(pool, InstrumentedQueuePool)
+    checkouts_before = sample("db_pool_checkout_wait_seconds_count")
+    timeouts_before = sample("db_pool_checkout_timeouts_total")
+
+    small_pool = InstrumentedQueuePool(MagicMock, pool_size=1, max_overflow=0, timeout=0.05)
+    connection = small_pool.connect()
+    with pytest.raises(PoolTimeoutError):
+        small_pool.connect()
+    connection.close()
+
+    assert sample("db_pool_checkout_wait_seconds_count") == checkouts_before + 2
+    assert sample("db_pool_checkout_timeouts_total") == timeouts_before + 1
+
+
+def test_metrics_disabled_from_environment(database_uri, monkeypatch):
+    monkeypatch.setenv("METRICS_ENABLED", "false")
+
+    flask_app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": database_uri})
+
+    assert flask_app.test_client().get("/metrics").status_code == 404
@@ -0,0 +1,106 @@
+import os
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from flask import request_finished
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app import create_app
+from app.db import READ_PRIMARY_COOKIE, db
+from app.models.category import Category
+from app.models.product import Product
+from tests.helpers import truncate_tables, worker_database_uri
+
+REPLICA_URI = os.environ.get("SQLALCHEMY_TEST_REPLICA_DATABASE_URI")
+
+pytestmark = pytest.mark.skipif(
+    not REPLICA_URI, reason="SQLALCHEMY_TEST_REPLICA_DATABASE_URI is not set")
+
+
+@pytest.fixture
+def replica_app(database_uri):
+    """
+    App whose replica is a second, independent database.
+
+    Nothing replicates between the two, so every read shows which one it came from.
+    """
+    flask_app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": database_uri,
+        "SQLALCHEMY_REPLICA_URIS": [worker_database_uri(REPLICA_URI)],
+    })
+
+    @request_finished.connect_via(flask_app)
+    def expire_session(sender, response, **extra):
+        db.session.remove()
+
+    with flask_app.app_context():
+        replica = db.engines["replica_0"]
+        db.metadata.create_all(replica)
+        product_id = uuid4()
+        for engine, name in ((db.engine, "primary"), (replica, "replica")):
+            with Session(engine) as session:
+                session.add(Product(id=product_id, name=name, description="", price=Decimal("10.00"),
+                                    stock=5, image_url=""))
+                session.commit()
+
+        def read_product_name():
+            return db.session.scalar(select(Product.name))
+
+        def write_category():
+            db.session.add(Category(name="Teaware"))
+            db.session.commit()
+            return "", 204
+
+        flask_app.add_url_rule("/read", "read", read_product_name, methods=["GET", "POST"])
+        flask_app.add_url_rule("/write", "write", write_category, methods=["POST"])
+        yield flask_app
+
+    with flask_app.app_context():
+        with db.engine.begin() as connection:
+            truncate_tables(connection)
+        db.metadata.drop_all(db.engines["replica_0"])
+
+
+def test_read_requests_use_replica(replica_app):
+    client = replica_app.test_client()
+
+    assert client.get("/read").text == "replica"
+    assert client.post("/read").text == "primary"
+
+
+def test_read_your_writes_window(replica_app):
+    """After a write, the same client reads from the primary until the window ends."""
+    client = replica_app.test_client()
+
+    response = client.post("/write")
+    assert READ_PRIMARY_COOKIE in response.headers["Set-Cookie"]
+    assert client.get("/read").text == "primary"
+
+    assert replica_app.test_client().get("/read").text == "replica"
+
+    client.delete_cookie(READ_PRIMARY_COOKIE)
+    assert client.get("/read").text == "replica"
+
+
+def test_writes_and_locks_switch_session_to_primary(replica_app):
+    with replica_app.test_request_context("/read"):
+        replica_app.preprocess_request()
+
+        assert db.session.scalar(select(Product.name)) == "replica"
+        assert db.session.scalar(select(Product.name).with_for_update()) == "primary"
+        assert db.session.scalar(select(Product.name)) == "primary"
+        db.session.rollback()
+        db.session.info.pop("wrote")
+
+        db.session.execute(update(Product).values(stock=Product.stock - 1))
+        assert db.session.scalar(select(Product.stock)) == 4
+        db.session.rollback()
+
+
+def test_catalog_cache_built_from_primary(replica_app):
+    client = replica_app.test_client()
+
+    assert [product["name"] for product in client.get("/products/").json] == ["primary"]
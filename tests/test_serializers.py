@@ -0,0 +1,54 @@
+from datetime import datetime
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+
+from app.models.order import Order, OrderStatus
+from app.models.product import Product
+from app.serializers import serializers
+
+
+def test_serializer_converts_column_types():
+    order_id = uuid4()
+    order = Order(id=order_id, user_id="user-1", address_id=3, total_amount=Decimal("12.50"),
+                  order_date=datetime(2025, 1, 2, 3, 4, 5), status=OrderStatus.PENDING)
+
+    assert serializers.get(Order)(order) == {
+        "id": str(order_id),
+        "user_id": "user-1",
+        "address_id": 3,
+        "total_amount": 12.5,
+        "order_date": "2025-01-02T03:04:05",
+        "status": "Pending",
+    }
+
+
+def test_to_dict_keeps_column_values():
+    order_id = uuid4()
+    order_date = datetime(2025, 1, 2, 3, 4, 5)
+    order = Order(id=order_id, user_id="user-1", address_id=3, total_amount=Decimal("12.50"),
+                  order_date=order_date, status=OrderStatus.PENDING)
+
+    assert order.to_dict() == {
+        "id": order_id,
+        "user_id": "user-1",
+        "address_id": 3,
+        "total_amount": Decimal("12.50"),
+        "order_date": order_date,
+        "status": OrderStatus.PENDING,
+    }
+
+
+def test_serializer_field_subset_and_rename():
+    product = Product(id=uuid4(), name="Tatami mat", price=49.0, stock=2, description=None)
+
+    serialize = serializers.get(Product, ("id", "name", "description"), {"id": "product_id"})
+
+    assert serialize(product) == {"product_id": str(product.id), "name": "Tatami mat", "description": None}
+    assert serializers.get(Product, ["description", "name", "id"], {"id": "product_id"}) is serialize
+
+
+def test_serializer_rejects_unknown_fields():
+    with pytest.raises(ValueError, match="Unknown fields for Product: secret"):
+        serializers.get(Product, ("id", "secret"))